@@ -0,0 +1,133 @@
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from app.common import logger
+from app.common.enums import CircuitStateEnum
+from app.common.exceptions import CircuitOpenException
+from app.common.metrics import metrics
+
+T = TypeVar("T")
+
+# values of state gauge
+STATE_VALUES = {
+    CircuitStateEnum.CLOSED: 0,
+    CircuitStateEnum.HALF_OPEN: 1,
+    CircuitStateEnum.OPEN: 2,
+}
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of calls to a dependency within the worker
+    Closed circuit records outcome of calls in rolling time window and opens when rate of failed or slow calls
+    exceeds threshold. Open circuit rejects calls immediately, after open_duration it becomes half-open
+    and lets a few trial calls through: their success closes the circuit, a failure opens it again
+    """
+
+    def __init__(
+            self,
+            name: str,
+            failure_exceptions: tuple[type[BaseException], ...] = (Exception,),
+            window: float = 30.0,
+            min_calls: int = 10,
+            failure_rate: float = 0.5,
+            slow_call_duration: float = 1.0,
+            slow_call_rate: float = 0.5,
+            open_duration: float = 10.0,
+            half_open_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_exceptions = failure_exceptions
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        # finish time, failed, slow of calls in the window
+        self._calls: deque[tuple[float, bool, bool]] = deque()
+        self._state = CircuitStateEnum.CLOSED
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._trial_successes = 0
+        # incremented on every transition, outcome of call admitted in previous state is not recorded
+        self._generation = 0
+        metrics.set(f"{name}_circuit_state", STATE_VALUES[self._state])
+
+    @property
+    def state(self) -> CircuitStateEnum:
+        if self._state == CircuitStateEnum.OPEN and time.monotonic() - self._opened_at >= self.open_duration:
+            self._transition(CircuitStateEnum.HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: CircuitStateEnum) -> None:
+        logger.warning(f"CircuitBreaker {self.name}: {self._state.value} -> {state.value}")
+        self._state = state
+        self._generation += 1
+        self._trial_calls = 0
+        self._trial_successes = 0
+        if state == CircuitStateEnum.OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CircuitStateEnum.CLOSED:
+            self._calls.clear()
+        metrics.inc(f"{self.name}_circuit_{state.value.lower()}_transitions")
+        metrics.set(f"{self.name}_circuit_state", STATE_VALUES[state])
+
+    def _acquire(self) -> int:
+        state = self.state
+        if state == CircuitStateEnum.OPEN or (
+                state == CircuitStateEnum.HALF_OPEN and self._trial_calls >= self.half_open_calls
+        ):
+            metrics.inc(f"{self.name}_circuit_rejected_calls")
+            raise CircuitOpenException(self.name)
+        if state == CircuitStateEnum.HALF_OPEN:
+            self._trial_calls += 1
+        return self._generation
+
+    def _record(self, generation: int, duration: float, failed: bool) -> None:
+        if generation != self._generation:
+            # call started before circuit was opened or before trial calls began
+            return
+        slow = duration >= self.slow_call_duration
+        if self._state == CircuitStateEnum.HALF_OPEN:
+            if failed or slow:
+                self._transition(CircuitStateEnum.OPEN)
+            else:
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._transition(CircuitStateEnum.CLOSED)
+            return
+        now = time.monotonic()
+        self._calls.append((now, failed, slow))
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+        if len(self._calls) < self.min_calls:
+            return
+        failures = sum(1 for _, failed, _ in self._calls if failed)
+        slow_calls = sum(1 for _, _, slow in self._calls if slow)
+        if failures >= self.failure_rate * len(self._calls) or slow_calls >= self.slow_call_rate * len(self._calls):
+            self._transition(CircuitStateEnum.OPEN)
+
+    async def call(self, func: Callable[[], Awaitable[T]], is_failure: Callable[[T], bool] = lambda _: False) -> T:
+        """
+        Run call through the circuit, raises CircuitOpenException without calling if circuit is open
+        :param func: coroutine function calling the dependency
+        :param is_failure: check of result that counts it as failure, e.g. 5xx response
+        :return: result of call
+        """
+        generation = self._acquire()
+        started = time.monotonic()
+        try:
+            result = await func()
+        except self.failure_exceptions:
+            self._record(generation, time.monotonic() - started, failed=True)
+            raise
+        except BaseException:
+            # cancelled call says nothing about the dependency, free the trial slot
+            if generation == self._generation and self._state == CircuitStateEnum.HALF_OPEN:
+                self._trial_calls -= 1
+            raise
+        self._record(generation, time.monotonic() - started, failed=is_failure(result))
+        return result
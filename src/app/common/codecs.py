@@ -0,0 +1,79 @@
+import zlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Generic, TypeVar
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.common import settings
+
+T = TypeVar("T")
+
+FLAG_COMPRESSED = 0x01
+
+
+class ICodec(ABC, Generic[T]):
+    """
+    Serialization of cached objects to bytes
+    """
+
+    @abstractmethod
+    def encode(self, obj: T) -> bytes:
+        """
+        Serialize object
+        :param obj: object to serialize
+        :return: serialized object
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def decode(self, data: bytes) -> T | None:
+        """
+        Deserialize object
+        :param data: serialized object
+        :return: object or None if data was written in another format or version
+        """
+        raise NotImplementedError
+
+
+class SchemaCodec(ICodec[T]):
+    """
+    Codec for pydantic schemas and lists of schemas
+    Fields are encoded to compact JSON by pydantic core, payloads bigger than threshold are compressed.
+    Header contains format version and flags, data with another version is treated as missing,
+    so values written by previous deploys are ignored instead of breaking deserialization
+    """
+    VERSION: int = 1
+
+    def __init__(self, type_: Any, compress_threshold: int = settings.CACHE_COMPRESS_THRESHOLD):
+        self.adapter = TypeAdapter(type_)
+        self.compress_threshold = compress_threshold
+
+    def encode(self, obj: T) -> bytes:
+        flags = 0
+        payload = self.adapter.dump_json(obj)
+        if len(payload) > self.compress_threshold:
+            payload = zlib.compress(payload, level=1)
+            flags |= FLAG_COMPRESSED
+        return bytes((self.VERSION, flags)) + payload
+
+    def decode(self, data: bytes) -> T | None:
+        if len(data) < 2 or data[0] != self.VERSION:
+            return None
+        payload = data[2:]
+        try:
+            if data[1] & FLAG_COMPRESSED:
+                payload = zlib.decompress(payload)
+            return self.adapter.validate_json(payload)
+        except (zlib.error, ValidationError):
+            return None
+
+
+@lru_cache
+def schema_codec(type_: Any) -> SchemaCodec:
+    """
+    Codec for given schema type, codecs are created once per type
+    :param type_: pydantic schema or list of schemas
+    :return: codec
+    """
+    return SchemaCodec(type_)
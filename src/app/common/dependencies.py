@@ -1,10 +1,16 @@
 from fastapi import FastAPI
 
+from app.common import settings
 from app.infrastructure.adapters.http_client import (
     http_session,
-    http_client,
+    auth_http_client,
+)
+from app.infrastructure.cache.orders import RedisOrderCache
+from app.infrastructure.db.sessions import (
+    app_sessionmaker,
+    async_session,
+    session_factory,
 )
-from app.infrastructure.db.sessions import async_session, session_factory
 from app.infrastructure.repositories.redis.base import (
     IRedisBaseRepository,
     RedisBaseRepository,
@@ -12,19 +18,24 @@ from app.infrastructure.repositories.redis.base import (
 from app.infrastructure.repositories.redis.users import UserRepository
 from app.infrastructure.repositories.sqlalchemy import OrderRepository
 from app.infrastructure.repositories.sqlalchemy.base import SQLAlchemyBaseRepository
+from app.interfaces.cache import IOrderCache
 from app.interfaces.repositories.base import IBaseRepository
 from app.interfaces.repositories.orders import IOrderRepository
 from app.interfaces.repositories.users import IUserRepository
+from app.orders.cache import bind_refresh_sessions
 from app.orders.services import IOrderService, OrderService
 from app.users.services import IAuthService, AuthService
 
 
 def bind_dependencies(app: FastAPI, db_url: str):
-    app.dependency_overrides[async_session] = session_factory(db_url)
-    app.dependency_overrides[http_session] = http_client()
+    sessions = app_sessionmaker(db_url, settings.replica_urls)
+    app.dependency_overrides[async_session] = session_factory(sessions)
+    bind_refresh_sessions(sessions)
+    app.dependency_overrides[http_session] = auth_http_client
 
     app.dependency_overrides[IBaseRepository] = SQLAlchemyBaseRepository
     app.dependency_overrides[IOrderRepository] = OrderRepository
+    app.dependency_overrides[IOrderCache] = RedisOrderCache
 
     app.dependency_overrides[IOrderService] = OrderService
     app.dependency_overrides[IAuthService] = AuthService
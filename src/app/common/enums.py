@@ -7,6 +7,12 @@ class OrderStatus(str, Enum):
     CANCELLED = "CANCELLED"
 
 
+class CircuitStateEnum(str, Enum):
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
 class UserRoleEnum(str, Enum):
     ADMIN = "ADMIN"
     USER = "USER"
@@ -2,14 +2,20 @@ from app.common.exceptions.exceptions import (
     ObjectDoesNotExistException,
     AuthenticationException,
     NoPermissionException,
+    InvalidTokenException,
+    InvalidCursorException,
     RedisConnectionException,
     AuthServiceNotAvailable,
+    CircuitOpenException,
 )
 
 __all__ = [
     "ObjectDoesNotExistException",
     "AuthenticationException",
     "NoPermissionException",
+    "InvalidTokenException",
+    "InvalidCursorException",
     "RedisConnectionException",
     "AuthServiceNotAvailable",
+    "CircuitOpenException",
 ]
@@ -29,6 +29,18 @@ class NoPermissionException(ApplicationBaseException):
         super().__init__(msg)
 
 
+class InvalidTokenException(ApplicationBaseException):
+    def __init__(self):
+        msg = "Token is invalid or expired"
+        super().__init__(msg)
+
+
+class InvalidCursorException(ApplicationBaseException):
+    def __init__(self, cursor: str):
+        msg = f"Invalid pagination cursor {cursor}"
+        super().__init__(msg)
+
+
 class RedisConnectionException(ApplicationBaseException):
     def __init__(self):
         msg = "Error connecting to Redis server"
@@ -39,3 +51,9 @@ class AuthServiceNotAvailable(ApplicationBaseException):
     def __init__(self):
         msg = "Auth Service Not Available"
         super().__init__(msg)
+
+
+class CircuitOpenException(ApplicationBaseException):
+    def __init__(self, name: str):
+        msg = f"Circuit {name} is open, calls are rejected"
+        super().__init__(msg)
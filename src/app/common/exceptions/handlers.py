@@ -8,10 +8,13 @@ from app.common.exceptions import (
     ObjectDoesNotExistException,
     AuthenticationException,
     NoPermissionException,
+    InvalidTokenException,
+    InvalidCursorException,
 )
 from app.common.exceptions.exceptions import (
     RedisConnectionException,
     AuthServiceNotAvailable,
+    CircuitOpenException,
 )
 
 
@@ -42,7 +45,26 @@ def not_enough_permission_handler(request: Request, exc: NoPermissionException):
     )
 
 
-def connection_error_handler(request: Request, exc: Union[RedisConnectionException, AuthServiceNotAvailable]):
+def invalid_token_handler(request: Request, exc: InvalidTokenException):
+    message = exc.args[0]
+    logging.error(f"URL: {request.url} MESSAGE: {message}")
+    return JSONResponse(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        content={"message": message},
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def bad_request_handler(request: Request, exc: InvalidCursorException):
+    message = exc.args[0]
+    logging.error(f"URL: {request.url} MESSAGE: {message}")
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"message": message}
+    )
+
+
+def connection_error_handler(request: Request, exc: Union[RedisConnectionException, AuthServiceNotAvailable, CircuitOpenException]):  # noqa: E501
     message = exc.args[0]
     logging.error(f"URL: {request.url} MESSAGE: {message}")
     return JSONResponse(
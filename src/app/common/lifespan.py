@@ -0,0 +1,47 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from fastapi import FastAPI
+
+from app.common import logger, settings
+from app.common.rabbitmq import publisher
+from app.common.redis import pubsub
+from app.events.relay import OutboxRelay
+from app.infrastructure.adapters.http_client import auth_http_client
+from app.infrastructure.db.pool import SERVICE_CONNECTIONS, check_pool_sizing
+from app.infrastructure.db.sessions import async_engine, async_session
+
+
+def lifespan_factory(db_url: str) -> Callable[[FastAPI], AsyncIterator[None]]:
+    """
+    Build lifespan handler that starts long-lived services with the app and shuts them down with it
+    :param db_url: database url used by background services
+    :return: lifespan context manager
+    """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        # relay uses one session at a time
+        engine = async_engine(db_url, name="outbox_db", pool_size=1, max_overflow=SERVICE_CONNECTIONS - 1)
+        relay = OutboxRelay(
+            session=async_session(engine),
+            publisher=publisher,
+            batch_size=settings.OUTBOX_BATCH_SIZE,
+            poll_interval=settings.OUTBOX_POLL_INTERVAL,
+        )
+        try:
+            await publisher.start()
+        except Exception as exc:
+            # events stay in the outbox, relay connects on the next batch
+            logger.error(f"RabbitMQ is not available on startup: {exc!r}")
+        await check_pool_sizing(engine)
+        await auth_http_client.start()
+        relay.start()
+        pubsub.start()
+        yield
+        await pubsub.stop()
+        await relay.stop()
+        await publisher.close()
+        await auth_http_client.close()
+        await engine.dispose()
+
+    return lifespan
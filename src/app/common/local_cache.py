@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+VALUE = TypeVar("VALUE")
+
+
+class LocalCache(Generic[VALUE]):
+    """
+    In-process LRU cache with per-entry TTL bounded by number of entries and total size
+    Not shared between workers, entries must be invalidated explicitly (see PubSubListener)
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[VALUE, float, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> VALUE | None:
+        """
+        Get value and mark it as recently used, expired value is removed
+        :param key: key of value
+        :return: value or None if value is missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: VALUE, ttl: float, size: int = 0) -> None:
+        """
+        Save value, least recently used values are evicted to fit limits
+        :param key: key of value
+        :param value: value to save
+        :param ttl: time to live in seconds
+        :param size: size of value in bytes, values bigger than max_bytes are not saved
+        :return: nothing
+        """
+        self.delete(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self.size += size
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
@@ -0,0 +1,52 @@
+from collections import defaultdict
+from typing import Callable, Union
+
+Number = Union[int, float]
+
+
+class Metrics:
+    """
+    In-process registry of counters and gauges, values are exposed by GET /api/metrics
+    """
+
+    def __init__(self):
+        self._counters: dict[str, Number] = defaultdict(int)
+        self._gauges: dict[str, Number] = {}
+        self._callbacks: dict[str, Callable[[], Number]] = {}
+
+    def inc(self, name: str, value: Number = 1) -> None:
+        """
+        Increase counter
+        :param name: name of the counter
+        :param value: increment
+        :return: nothing
+        """
+        self._counters[name] += value
+
+    def set(self, name: str, value: Number) -> None:
+        """
+        Set current value of gauge
+        :param name: name of the gauge
+        :param value: current value
+        :return: nothing
+        """
+        self._gauges[name] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], Number]) -> None:
+        """
+        Register gauge which value is read from callback when metrics are collected
+        :param name: name of the gauge
+        :param callback: function returning current value, replaces callback registered earlier with the same name
+        :return: nothing
+        """
+        self._callbacks[name] = callback
+
+    def snapshot(self) -> dict[str, Number]:
+        """
+        Current values of all counters and gauges
+        :return: dictionary metric name - value
+        """
+        return {**self._counters, **self._gauges, **{name: callback() for name, callback in self._callbacks.items()}}
+
+
+metrics = Metrics()
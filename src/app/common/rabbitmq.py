@@ -1,25 +1,85 @@
+import asyncio
+
 import aio_pika
+from aio_pika.abc import (
+    AbstractChannel,
+    AbstractRobustConnection,
+)
+from aio_pika.pool import Pool
 
 from app.common import settings, logger
 
 
-async def rabbit_connection() -> aio_pika.abc.AbstractRobustConnection:
-    return await aio_pika.connect_robust(settings.rabbitmq_url)
-
-
-async def publish_message(message: str) -> None:
+class RabbitPublisher:
     """
-    Sample function to publish message to RabbitMQ queue "orders"
-    :param message: string message to publish
-    :return: nothing
+    Long-lived publisher for RabbitMQ
+    Holds one robust connection and a pool of channels, topology (exchange, queue and binding)
+    is declared once on start, so publishing a message doesn't cost any extra round trips
     """
-    logger.info(f"Publishing message: {message}")
-    async with await rabbit_connection() as conn:
-        channel = await conn.channel()
-        exchange = await channel.declare_exchange('direct', auto_delete=False)
-        queue = await channel.declare_queue(settings.RABBITMQ_QUEUE, auto_delete=False)
-        await queue.bind(exchange, settings.RABBITMQ_ROUTE)
-        await exchange.publish(
-            aio_pika.Message(body=message.encode()),
-            routing_key=settings.RABBITMQ_ROUTE
-        )
+
+    def __init__(self, url: str, pool_size: int):
+        self.url = url
+        self.pool_size = pool_size
+        self._connection: AbstractRobustConnection | None = None
+        self._channels: Pool[AbstractChannel] | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_started(self) -> bool:
+        return self._channels is not None
+
+    async def _get_channel(self) -> AbstractChannel:
+        return await self._connection.channel()
+
+    async def start(self) -> None:
+        """
+        Open connection, create pool of channels and declare topology
+        :return: nothing
+        """
+        async with self._lock:
+            if self.is_started:
+                return
+            logger.info("RabbitPublisher: starting")
+            self._connection = await aio_pika.connect_robust(self.url)
+            channels = Pool(self._get_channel, max_size=self.pool_size)
+            async with channels.acquire() as channel:
+                exchange = await channel.declare_exchange(settings.RABBITMQ_EXCHANGE, auto_delete=False)
+                queue = await channel.declare_queue(settings.RABBITMQ_QUEUE, auto_delete=False)
+                await queue.bind(exchange, settings.RABBITMQ_ROUTE)
+            self._channels = channels
+
+    async def close(self) -> None:
+        """
+        Close pool of channels and connection
+        :return: nothing
+        """
+        async with self._lock:
+            if not self.is_started:
+                return
+            logger.info("RabbitPublisher: closing")
+            await self._channels.close()
+            await self._connection.close()
+            self._channels = None
+            self._connection = None
+
+    async def publish_batch(self, messages: list[str]) -> None:
+        """
+        Publish batch of messages on one channel and wait for all publisher confirms,
+        raises if any of the messages was not confirmed by the broker
+        :param messages: list of string messages to publish
+        :return: nothing
+        """
+        if not self.is_started:
+            await self.start()
+        async with self._channels.acquire() as channel:
+            exchange = await channel.get_exchange(settings.RABBITMQ_EXCHANGE, ensure=False)
+            await asyncio.gather(*(
+                exchange.publish(
+                    aio_pika.Message(body=message.encode(), delivery_mode=aio_pika.DeliveryMode.PERSISTENT),
+                    routing_key=settings.RABBITMQ_ROUTE
+                )
+                for message in messages
+            ))
+
+
+publisher = RabbitPublisher(settings.rabbitmq_url, pool_size=settings.RABBITMQ_CHANNEL_POOL_SIZE)
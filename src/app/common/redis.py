@@ -1,6 +1,10 @@
+import asyncio
+from typing import Awaitable, Callable
+
 from redis import asyncio as aioredis
+from redis.exceptions import ConnectionError
 
-from app.common import settings
+from app.common import settings, logger
 
 
 def redis():
@@ -12,3 +16,53 @@ def redis():
 
 
 r = redis()
+
+
+class PubSubListener:
+    """
+    Background task that dispatches messages of Redis pub/sub channels to registered handlers
+    Handlers are registered on import and subscribed when the listener is started
+    """
+
+    def __init__(self, connection: aioredis.Redis, reconnect_interval: float = 1.0):
+        self.connection = connection
+        self.reconnect_interval = reconnect_interval
+        self._handlers: dict[str, Callable[[dict], Awaitable[None]]] = {}
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, channel: str, handler: Callable[[dict], Awaitable[None]]) -> None:
+        """
+        Register handler of channel messages
+        :param channel: name of channel
+        :param handler: coroutine function that receives message
+        :return: nothing
+        """
+        self._handlers[channel] = handler
+
+    async def run(self) -> None:
+        while True:
+            pubsub = self.connection.pubsub()
+            try:
+                await pubsub.subscribe(**self._handlers)
+                await pubsub.run()
+            except ConnectionError as exc:
+                logger.error(f"PubSubListener: connection lost: {exc!r}")
+                await asyncio.sleep(self.reconnect_interval)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        if self._task is None and self._handlers:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+pubsub = PubSubListener(r)
@@ -3,6 +3,7 @@ from fastapi import (
     FastAPI,
 )
 
+from app.metrics.routers import metrics_router
 from app.users.routers import auth_router
 from app.orders.routers import order_router
 
@@ -11,4 +12,5 @@ def bind_routers(app: FastAPI):
     router = APIRouter(prefix="/api")
     router.include_router(order_router)
     router.include_router(auth_router)
+    router.include_router(metrics_router)
     app.include_router(router=router)
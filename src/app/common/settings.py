@@ -14,9 +14,60 @@ class Settings(BaseSettings):
     PG_DB: str = environ.get("POSTGRES_DB", default="")
     PG_HOST: str = environ.get("POSTGRES_HOST", default="")
     PG_PORT: str = environ.get("POSTGRES_PORT", default="")
+    # comma separated host:port of read replicas, reads of orders are routed to them
+    PG_REPLICA_HOSTS: str = environ.get("POSTGRES_REPLICA_HOSTS", default="")
+    # seconds after write during which reads of the user are routed to primary
+    DB_PRIMARY_PIN_WINDOW: int = environ.get("DB_PRIMARY_PIN_WINDOW", default=5)
+
+    DB_POOL_SIZE: int = environ.get("DB_POOL_SIZE", default=5)
+    DB_MAX_OVERFLOW: int = environ.get("DB_MAX_OVERFLOW", default=5)
+    DB_POOL_TIMEOUT: float = environ.get("DB_POOL_TIMEOUT", default=10)
+    DB_POOL_RECYCLE: int = environ.get("DB_POOL_RECYCLE", default=1800)
+    DB_POOL_PRE_PING: bool = environ.get("DB_POOL_PRE_PING", default=False)
+    DB_CONNECT_TIMEOUT: float = environ.get("DB_CONNECT_TIMEOUT", default=10)
+    # 0 disables cache of prepared statements, required behind PgBouncer in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = environ.get("DB_STATEMENT_CACHE_SIZE", default=500)
+    # default isolation level, operations that need stricter one declare it, see db/transactions.py
+    DB_ISOLATION_LEVEL: str = environ.get("DB_ISOLATION_LEVEL", default="READ COMMITTED")
+    DB_TRANSACTION_RETRIES: int = environ.get("DB_TRANSACTION_RETRIES", default=3)
+    DB_RETRY_BASE_DELAY: float = environ.get("DB_RETRY_BASE_DELAY", default=0.02)
+    # number of worker processes sharing max_connections of database, used for pool sizing guidance
+    DB_WORKERS: int = environ.get("DB_WORKERS", default=environ.get("WEB_CONCURRENCY", default=1))
 
     SECRET_KEY: str = environ.get("SECRET_KEY", default="")
     AUTH_URL: str = environ.get("AUTH_URL", default="")
+    # verify tokens locally with SECRET_KEY (HS*) or JWKS of auth service (RS*), unknown tokens are validated remotely
+    AUTH_LOCAL_VERIFICATION: bool = environ.get("AUTH_LOCAL_VERIFICATION", default=False)
+    AUTH_JWKS_URL: str = environ.get("AUTH_JWKS_URL", default="")
+    AUTH_JWKS_TTL: int = environ.get("AUTH_JWKS_TTL", default=3600)
+    JWT_ALGORITHMS: str = environ.get("JWT_ALGORITHMS", default="HS256")
+    JWT_LEEWAY: int = environ.get("JWT_LEEWAY", default=30)
+    JWT_ISSUER: str = environ.get("JWT_ISSUER", default="")
+    JWT_AUDIENCE: str = environ.get("JWT_AUDIENCE", default="")
+    # shared client of auth service, timeouts are applied to each request
+    AUTH_HTTP_MAX_CONNECTIONS: int = environ.get("AUTH_HTTP_MAX_CONNECTIONS", default=100)
+    AUTH_HTTP_MAX_KEEPALIVE: int = environ.get("AUTH_HTTP_MAX_KEEPALIVE", default=20)
+    AUTH_HTTP_KEEPALIVE_EXPIRY: float = environ.get("AUTH_HTTP_KEEPALIVE_EXPIRY", default=30)
+    AUTH_HTTP_TIMEOUT: float = environ.get("AUTH_HTTP_TIMEOUT", default=5)
+    AUTH_HTTP_CONNECT_TIMEOUT: float = environ.get("AUTH_HTTP_CONNECT_TIMEOUT", default=2)
+    AUTH_HTTP_POOL_TIMEOUT: float = environ.get("AUTH_HTTP_POOL_TIMEOUT", default=1)
+    # requires h2 package (httpx[http2]), HTTP/1.1 is used without it
+    AUTH_HTTP2: bool = environ.get("AUTH_HTTP2", default=False)
+    # circuit breaker of auth service: opens when rate of failed or slow calls in the window exceeds threshold
+    AUTH_BREAKER_WINDOW: float = environ.get("AUTH_BREAKER_WINDOW", default=30)
+    AUTH_BREAKER_MIN_CALLS: int = environ.get("AUTH_BREAKER_MIN_CALLS", default=10)
+    AUTH_BREAKER_FAILURE_RATE: float = environ.get("AUTH_BREAKER_FAILURE_RATE", default=0.5)
+    AUTH_BREAKER_SLOW_CALL_DURATION: float = environ.get("AUTH_BREAKER_SLOW_CALL_DURATION", default=1)
+    AUTH_BREAKER_SLOW_CALL_RATE: float = environ.get("AUTH_BREAKER_SLOW_CALL_RATE", default=0.5)
+    AUTH_BREAKER_OPEN_DURATION: float = environ.get("AUTH_BREAKER_OPEN_DURATION", default=10)
+    AUTH_BREAKER_HALF_OPEN_CALLS: int = environ.get("AUTH_BREAKER_HALF_OPEN_CALLS", default=1)
+
+    # expiration in seconds of tokens stored in Redis when neither auth service nor token tells it
+    TOKEN_DEFAULT_TTL: int = environ.get("TOKEN_DEFAULT_TTL", default=3600)
+    # in-process cache of validated tokens in front of Redis
+    TOKEN_CACHE_TTL: int = environ.get("TOKEN_CACHE_TTL", default=30)
+    TOKEN_CACHE_MAX_ENTRIES: int = environ.get("TOKEN_CACHE_MAX_ENTRIES", default=10_000)
+    TOKEN_CACHE_MAX_BYTES: int = environ.get("TOKEN_CACHE_MAX_BYTES", default=8 * 1024 * 1024)
 
     REDIS_HOST: str = environ.get("REDIS_HOST", default="")
     REDIS_PORT: str = environ.get("REDIS_PORT", default="")
@@ -27,6 +78,25 @@ class Settings(BaseSettings):
     RABBITMQ_PASSWORD: str = environ.get('RABBITMQ_PASSWORD', default="guest")
     RABBITMQ_QUEUE: str = environ.get('RABBITMQ_QUEUE', default="orders")
     RABBITMQ_ROUTE: str = environ.get('RABBITMQ_ROUTE', default="orders")
+    RABBITMQ_EXCHANGE: str = environ.get('RABBITMQ_EXCHANGE', default="direct")
+    RABBITMQ_CHANNEL_POOL_SIZE: int = environ.get('RABBITMQ_CHANNEL_POOL_SIZE', default=10)
+
+    CACHE_COMPRESS_THRESHOLD: int = environ.get("CACHE_COMPRESS_THRESHOLD", default=1024)
+    ORDER_CACHE_L1_ENABLED: bool = environ.get("ORDER_CACHE_L1_ENABLED", default=True)
+    ORDER_CACHE_L1_TTL: int = environ.get("ORDER_CACHE_L1_TTL", default=5)
+    ORDER_CACHE_L1_MAX_ENTRIES: int = environ.get("ORDER_CACHE_L1_MAX_ENTRIES", default=10_000)
+    ORDER_CACHE_L1_MAX_BYTES: int = environ.get("ORDER_CACHE_L1_MAX_BYTES", default=32 * 1024 * 1024)
+    ORDER_CACHE_LOCK_ENABLED: bool = environ.get("ORDER_CACHE_LOCK_ENABLED", default=True)
+    ORDER_CACHE_LOCK_TTL: int = environ.get("ORDER_CACHE_LOCK_TTL", default=2000)
+    ORDER_CACHE_LOCK_POLL_INTERVAL: int = environ.get("ORDER_CACHE_LOCK_POLL_INTERVAL", default=20)
+    ORDER_LIST_CACHE_TTL: int = environ.get("ORDER_LIST_CACHE_TTL", default=300)
+    ORDER_LIST_CACHE_SOFT_TTL: int = environ.get("ORDER_LIST_CACHE_SOFT_TTL", default=30)
+    ORDER_CACHE_MAX_REFRESHES: int = environ.get("ORDER_CACHE_MAX_REFRESHES", default=20)
+
+    ORDERS_BULK_MAX_SIZE: int = environ.get("ORDERS_BULK_MAX_SIZE", default=1000)
+
+    OUTBOX_BATCH_SIZE: int = environ.get('OUTBOX_BATCH_SIZE', default=100)
+    OUTBOX_POLL_INTERVAL: float = environ.get('OUTBOX_POLL_INTERVAL', default=1.0)
 
     @property
     def db_url(self):
@@ -38,6 +108,13 @@ class Settings(BaseSettings):
             self.PG_DB
         )  # noqa E501
 
+    @property
+    def replica_urls(self) -> list[str]:
+        return [
+            "postgresql+asyncpg://{}:{}@{}/{}".format(self.PG_USER, self.PG_PASSWORD, host.strip(), self.PG_DB)
+            for host in self.PG_REPLICA_HOSTS.split(",") if host.strip()
+        ]
+
     @property
     def rabbitmq_url(self):
         return "amqp://{}:{}@{}:{}/".format(
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.common import logger
+from app.common.rabbitmq import RabbitPublisher
+from app.infrastructure.repositories.sqlalchemy.outbox import OutboxRepository
+
+
+class OutboxRelay:
+    """
+    Background task that drains outbox table "order_events" in batches and publishes events to RabbitMQ
+    Batch is marked as published only after all publisher confirms are received,
+    so events are delivered at least once and independently of request latency
+    """
+
+    def __init__(
+            self,
+            session: async_sessionmaker[AsyncSession],
+            publisher: RabbitPublisher,
+            batch_size: int,
+            poll_interval: float,
+            repository: type[OutboxRepository] = OutboxRepository,
+    ):
+        self.session = session
+        self.repository = repository
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._task: asyncio.Task | None = None
+
+    async def relay_batch(self) -> int:
+        """
+        Publish one batch of pending events
+        :return: number of published events
+        """
+        async with self.session() as session:
+            repo = self.repository(session=session)
+            events = await repo.fetch_pending(self.batch_size)
+            if events:
+                await self.publisher.publish_batch([json.dumps(event.payload) for event in events])
+                await repo.mark_published([event.uuid for event in events])
+            await session.commit()
+        return len(events)
+
+    async def run(self) -> None:
+        """
+        Relay events until cancelled, full batches are relayed without waiting
+        :return: nothing
+        """
+        while True:
+            try:
+                published = await self.relay_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"OutboxRelay: failed to relay events: {exc!r}")
+                published = 0
+            if published:
+                logger.info(f"OutboxRelay: published {published} events")
+            if published < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
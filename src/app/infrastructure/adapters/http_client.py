@@ -1,15 +1,173 @@
-import typing
+import asyncio
+import time
+from typing import Any
 
-from httpx import AsyncClient
+from httpx import (
+    AsyncClient,
+    AsyncHTTPTransport,
+    Limits,
+    PoolTimeout,
+    Request,
+    Response,
+    Timeout,
+)
+
+from app.common import logger, settings
+from app.common.metrics import metrics
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 
 def http_session() -> AsyncClient:
     raise NotImplementedError
 
 
-def http_client(base_url: str = ''):
-    async def wrapper() -> typing.Callable[..., "AsyncClient"]:
-        async with AsyncClient(base_url=base_url) as client:
-            yield client
+class TracedTransport(AsyncHTTPTransport):
+    """
+    Transport that collects connection stats of the pool from httpcore trace events:
+    requests, new connections (requests - new connections = reused ones), open connections,
+    time spent waiting for a free connection of the pool and pool timeouts
+    """
+
+    def __init__(self, name: str, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.connections = 0
+        metrics.register_gauge(f"{name}_connections", lambda: self.connections)
+
+    def _track_stream(self, stream: Any, connection: dict) -> None:
+        """
+        Count connection as closed when its network stream is closed, httpcore traces closing
+        of connections without request, so it is not seen by trace extension
+        :param stream: network stream returned by connect_tcp or start_tls
+        :param connection: state of connection shared by its TCP and TLS streams
+        :return: nothing
+        """
+        close = stream.aclose
+
+        async def aclose() -> None:
+            if connection["open"]:
+                connection["open"] = False
+                self.connections -= 1
+            await close()
+
+        stream.aclose = aclose
+
+    async def handle_async_request(self, request: Request) -> Response:
+        started = time.perf_counter()
+        state = {"connect": 0.0}
+        caller_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict) -> None:
+            if event_name.startswith("connection.connect_") and event_name.endswith(".started"):
+                state["connect_started"] = time.perf_counter()
+                metrics.inc(f"{self.name}_new_connections")
+            elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+                state["connect"] = time.perf_counter() - state["connect_started"]
+                if event_name == "connection.connect_tcp.complete":
+                    state["connection"] = {"open": True}
+                    self.connections += 1
+                # TLS stream wraps TCP stream and is closed instead of it
+                self._track_stream(info["return_value"], state["connection"])
+            elif event_name.endswith("send_request_headers.started") and "sent" not in state:
+                state["sent"] = time.perf_counter()
+            if caller_trace is not None:
+                await caller_trace(event_name, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        metrics.inc(f"{self.name}_requests")
+        try:
+            return await super().handle_async_request(request)
+        except PoolTimeout:
+            metrics.inc(f"{self.name}_pool_timeouts")
+            raise
+        finally:
+            if "sent" in state:
+                # time before request was sent, except time of opening new connection, is time of waiting for pool
+                metrics.inc(f"{self.name}_pool_wait_seconds", max(state["sent"] - started - state["connect"], 0.0))
+
+
+class SharedHttpClient:
+    """
+    Application-lifetime http client, connections to the service are kept alive and reused between requests
+    Client is created on start in lifespan handler or on first use and closed on shutdown
+    """
+
+    def __init__(
+            self,
+            name: str,
+            base_url: str = "",
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            keepalive_expiry: float = 5.0,
+            timeout: float = 5.0,
+            connect_timeout: float = 5.0,
+            pool_timeout: float = 5.0,
+            http2: bool = False,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = Timeout(timeout, connect=connect_timeout, pool=pool_timeout)
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning(f"{name}: HTTP/2 requires h2 package, HTTP/1.1 is used")
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._client: AsyncClient | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_started(self) -> bool:
+        return self._client is not None
+
+    async def start(self) -> None:
+        """
+        Create client with pool of connections
+        :return: nothing
+        """
+        async with self._lock:
+            if self.is_started:
+                return
+            logger.info(f"{self.name}: starting, http2={self.http2}, limits={self.limits}")
+            transport = TracedTransport(self.name, limits=self.limits, http2=self.http2)
+            self._client = AsyncClient(base_url=self.base_url, transport=transport, timeout=self.timeout)
+
+    async def close(self) -> None:
+        """
+        Close client and all connections of the pool
+        :return: nothing
+        """
+        async with self._lock:
+            if not self.is_started:
+                return
+            logger.info(f"{self.name}: closing")
+            await self._client.aclose()
+            self._client = None
+
+    async def __call__(self) -> AsyncClient:
+        """
+        Dependency returning shared client
+        :return: started client
+        """
+        if not self.is_started:
+            await self.start()
+        return self._client
+
 
-    return wrapper
+auth_http_client = SharedHttpClient(
+    "auth_http",
+    max_connections=settings.AUTH_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.AUTH_HTTP_MAX_KEEPALIVE,
+    keepalive_expiry=settings.AUTH_HTTP_KEEPALIVE_EXPIRY,
+    timeout=settings.AUTH_HTTP_TIMEOUT,
+    connect_timeout=settings.AUTH_HTTP_CONNECT_TIMEOUT,
+    pool_timeout=settings.AUTH_HTTP_POOL_TIMEOUT,
+    http2=settings.AUTH_HTTP2,
+)
@@ -0,0 +1,27 @@
+from typing import Iterable
+from uuid import UUID
+
+from app.common.enums import OrderStatus
+from app.interfaces.cache import IOrderCache
+from app.orders.cache import (
+    affected_listing_tags,
+    invalidate_listings,
+    invalidate_orders,
+)
+from app.orders.schemas import OrderStatusChangeSchema
+
+
+class RedisOrderCache(IOrderCache):
+    """
+    Invalidation of orders cached in Redis and in-process tier by order_cache decorator
+    """
+
+    async def invalidate_listings(self, user_id: UUID, statuses: Iterable[OrderStatus]) -> None:
+        await invalidate_listings(user_id, statuses)
+
+    async def invalidate_status_changes(self, changes: Iterable[OrderStatusChangeSchema]) -> None:
+        changes = list(changes)
+        tags = []
+        for change in changes:
+            tags += affected_listing_tags(change.user_id, [change.old_status, change.new_status])
+        await invalidate_orders([change.uuid for change in changes], tags)
@@ -0,0 +1,49 @@
+"""order_events_outbox
+
+Revision ID: a41f7c2e9b10
+Revises: 3f8c1d8d348a
+Create Date: 2026-10-18 10:12:41.207316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f7c2e9b10'
+down_revision: Union[str, None] = '3f8c1d8d348a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'order_events',
+        sa.Column('order_uuid', sa.UUID(), nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('uuid', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('uuid')
+    )
+    op.create_index(
+        'ix_order_events_pending',
+        'order_events',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text('published_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_order_events_pending',
+        table_name='order_events',
+        postgresql_where=sa.text('published_at IS NULL'),
+    )
+    op.drop_table('order_events')
@@ -0,0 +1,98 @@
+"""order_totals
+
+Revision ID: c7d25b1f4e83
+Revises: a41f7c2e9b10
+Create Date: 2026-10-18 13:52:08.114702
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d25b1f4e83'
+down_revision: Union[str, None] = 'a41f7c2e9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+UPDATE_ORDER_TOTALS_FUNCTION = """
+CREATE OR REPLACE FUNCTION update_order_totals() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE orders SET total_price = orders.total_price + delta.total, item_count = orders.item_count + delta.items
+        FROM (
+            SELECT order_uuid, sum(price * quantity) AS total, sum(quantity) AS items
+            FROM new_products GROUP BY order_uuid
+        ) AS delta
+        WHERE orders.uuid = delta.order_uuid;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE orders SET total_price = orders.total_price - delta.total, item_count = orders.item_count - delta.items
+        FROM (
+            SELECT order_uuid, sum(price * quantity) AS total, sum(quantity) AS items
+            FROM old_products GROUP BY order_uuid
+        ) AS delta
+        WHERE orders.uuid = delta.order_uuid;
+    ELSE
+        UPDATE orders SET total_price = orders.total_price + delta.total, item_count = orders.item_count + delta.items
+        FROM (
+            SELECT order_uuid, sum(total) AS total, sum(items) AS items
+            FROM (
+                SELECT order_uuid, price * quantity AS total, quantity AS items FROM new_products
+                UNION ALL
+                SELECT order_uuid, -price * quantity, -quantity FROM old_products
+            ) AS changes
+            GROUP BY order_uuid
+        ) AS delta
+        WHERE orders.uuid = delta.order_uuid;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.add_column(
+        'orders',
+        sa.Column('total_price', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+    )
+    op.add_column('orders', sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(UPDATE_ORDER_TOTALS_FUNCTION)
+    # triggers lock products against writes until commit, so no change is missed by the backfill below
+    op.execute("""
+        CREATE TRIGGER products_insert_order_totals AFTER INSERT ON products
+        REFERENCING NEW TABLE AS new_products
+        FOR EACH STATEMENT EXECUTE FUNCTION update_order_totals()
+    """)
+    op.execute("""
+        CREATE TRIGGER products_update_order_totals AFTER UPDATE ON products
+        REFERENCING OLD TABLE AS old_products NEW TABLE AS new_products
+        FOR EACH STATEMENT EXECUTE FUNCTION update_order_totals()
+    """)
+    op.execute("""
+        CREATE TRIGGER products_delete_order_totals AFTER DELETE ON products
+        REFERENCING OLD TABLE AS old_products
+        FOR EACH STATEMENT EXECUTE FUNCTION update_order_totals()
+    """)
+    op.execute("""
+        UPDATE orders SET total_price = totals.total, item_count = totals.items
+        FROM (
+            SELECT order_uuid, sum(price * quantity) AS total, sum(quantity) AS items
+            FROM products GROUP BY order_uuid
+        ) AS totals
+        WHERE orders.uuid = totals.order_uuid
+    """)
+    op.create_index('ix_orders_total_price', 'orders', ['total_price'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_total_price', table_name='orders')
+    op.execute("DROP TRIGGER products_delete_order_totals ON products")
+    op.execute("DROP TRIGGER products_update_order_totals ON products")
+    op.execute("DROP TRIGGER products_insert_order_totals ON products")
+    op.execute("DROP FUNCTION update_order_totals()")
+    op.drop_column('orders', 'item_count')
+    op.drop_column('orders', 'total_price')
@@ -0,0 +1,53 @@
+"""order_query_indexes
+
+Revision ID: e5b8a0d6f217
+Revises: c7d25b1f4e83
+Create Date: 2026-10-18 14:21:45.530187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8a0d6f217'
+down_revision: Union[str, None] = 'c7d25b1f4e83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # indexes are built without locking tables against writes, which requires running outside of transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_order_uuid_price',
+            'products',
+            ['order_uuid', 'price'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_orders_user_status_created',
+            'orders',
+            ['user_id', 'status', 'created_at', 'uuid'],
+            unique=False,
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_orders_status_created',
+            'orders',
+            ['status', 'created_at', 'uuid'],
+            unique=False,
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_status_created', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_user_status_created', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_products_order_uuid_price', table_name='products', postgresql_concurrently=True)
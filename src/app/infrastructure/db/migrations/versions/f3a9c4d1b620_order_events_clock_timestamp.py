@@ -0,0 +1,27 @@
+"""order_events_clock_timestamp
+
+Revision ID: f3a9c4d1b620
+Revises: e5b8a0d6f217
+Create Date: 2026-10-18 15:02:11.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c4d1b620'
+down_revision: Union[str, None] = 'e5b8a0d6f217'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # now() is the same for all events of a transaction, clock_timestamp() keeps order of writes
+    op.alter_column('order_events', 'created_at', server_default=sa.text('clock_timestamp()'))
+
+
+def downgrade() -> None:
+    op.alter_column('order_events', 'created_at', server_default=sa.text('now()'))
@@ -1,7 +1,9 @@
+from app.infrastructure.db.models.events import OrderEventModel
 from app.infrastructure.db.models.orders import OrderModel
 from app.infrastructure.db.models.products import ProductModel
 
 __all__ = [
+    "OrderEventModel",
     "OrderModel",
     "ProductModel",
 ]
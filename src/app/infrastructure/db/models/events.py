@@ -0,0 +1,28 @@
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from app.infrastructure.db.models.base import BaseModel
+
+
+class OrderEventModel(BaseModel):
+    """
+    Transactional outbox for order events
+    Rows are written in the same transaction as the order change and relayed to RabbitMQ afterwards
+    """
+    __tablename__ = "order_events"
+
+    # events written in one transaction get distinct times, now() is the start of transaction
+    created_at = sa.Column(sa.DateTime(timezone=True), server_default=sa.func.clock_timestamp())
+
+    order_uuid = sa.Column(UUID(as_uuid=True), nullable=False)
+    event_type = sa.Column(sa.String(50), nullable=False)
+    payload = sa.Column(JSONB, nullable=False)
+    published_at = sa.Column(sa.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        sa.Index(
+            "ix_order_events_pending",
+            "created_at",
+            postgresql_where=sa.text("published_at IS NULL"),
+        ),
+    )
@@ -13,6 +13,9 @@ class OrderModel(BaseModel):
     status = sa.Column(sa.Enum(OrderStatus), nullable=False, default=OrderStatus.PENDING.value)
     is_deleted = sa.Column(sa.Boolean, nullable=False, default=False)
     user_id = sa.Column(UUID(as_uuid=True), nullable=False)
+    # maintained by trigger on products, see models/products.py
+    total_price = sa.Column(sa.Numeric(12, 2), nullable=False, server_default="0")
+    item_count = sa.Column(sa.Integer, nullable=False, server_default="0")
 
     products = relationship(
         "ProductModel",
@@ -20,3 +23,19 @@ class OrderModel(BaseModel):
         cascade="all, delete-orphan",
         lazy='selectin'
     )
+
+    __table_args__ = (
+        sa.Index("ix_orders_total_price", "total_price"),
+        # filter_orders of users and of admins: equality filters first, then keyset ordering,
+        # deleted orders are never queried
+        sa.Index(
+            "ix_orders_user_status_created",
+            "user_id", "status", "created_at", "uuid",
+            postgresql_where=sa.text("is_deleted = false"),
+        ),
+        sa.Index(
+            "ix_orders_status_created",
+            "status", "created_at", "uuid",
+            postgresql_where=sa.text("is_deleted = false"),
+        ),
+    )
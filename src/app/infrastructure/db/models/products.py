@@ -17,4 +17,67 @@ class ProductModel(BaseModel):
     __table_args__ = (
         sa.CheckConstraint('quantity > 0'),
         sa.CheckConstraint('price > 0'),
+        # selectin load of products of orders and price filter of filter_orders
+        sa.Index("ix_products_order_uuid_price", "order_uuid", "price"),
     )
+
+
+# Keeps orders.total_price and orders.item_count consistent with products of the order,
+# statement-level triggers apply aggregated changes of all affected rows with one UPDATE per statement
+UPDATE_ORDER_TOTALS_FUNCTION = """
+CREATE OR REPLACE FUNCTION update_order_totals() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE orders SET total_price = orders.total_price + delta.total, item_count = orders.item_count + delta.items
+        FROM (
+            SELECT order_uuid, sum(price * quantity) AS total, sum(quantity) AS items
+            FROM new_products GROUP BY order_uuid
+        ) AS delta
+        WHERE orders.uuid = delta.order_uuid;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE orders SET total_price = orders.total_price - delta.total, item_count = orders.item_count - delta.items
+        FROM (
+            SELECT order_uuid, sum(price * quantity) AS total, sum(quantity) AS items
+            FROM old_products GROUP BY order_uuid
+        ) AS delta
+        WHERE orders.uuid = delta.order_uuid;
+    ELSE
+        UPDATE orders SET total_price = orders.total_price + delta.total, item_count = orders.item_count + delta.items
+        FROM (
+            SELECT order_uuid, sum(total) AS total, sum(items) AS items
+            FROM (
+                SELECT order_uuid, price * quantity AS total, quantity AS items FROM new_products
+                UNION ALL
+                SELECT order_uuid, -price * quantity, -quantity FROM old_products
+            ) AS changes
+            GROUP BY order_uuid
+        ) AS delta
+        WHERE orders.uuid = delta.order_uuid;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+ORDER_TOTALS_TRIGGERS = [
+    """
+    CREATE TRIGGER products_insert_order_totals AFTER INSERT ON products
+    REFERENCING NEW TABLE AS new_products
+    FOR EACH STATEMENT EXECUTE FUNCTION update_order_totals()
+    """,
+    """
+    CREATE TRIGGER products_update_order_totals AFTER UPDATE ON products
+    REFERENCING OLD TABLE AS old_products NEW TABLE AS new_products
+    FOR EACH STATEMENT EXECUTE FUNCTION update_order_totals()
+    """,
+    """
+    CREATE TRIGGER products_delete_order_totals AFTER DELETE ON products
+    REFERENCING OLD TABLE AS old_products
+    FOR EACH STATEMENT EXECUTE FUNCTION update_order_totals()
+    """,
+]
+
+# Tables created with metadata.create_all (tests) get the same triggers as migrated database
+sa.event.listen(ProductModel.__table__, "after_create", sa.DDL(UPDATE_ORDER_TOTALS_FUNCTION))
+for trigger in ORDER_TOTALS_TRIGGERS:
+    sa.event.listen(ProductModel.__table__, "after_create", sa.DDL(trigger))
@@ -0,0 +1,83 @@
+import time
+
+import sqlalchemy as sa
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from app.common import logger, settings
+from app.common.metrics import metrics
+
+# connections of background services of the worker (outbox relay), see lifespan
+SERVICE_CONNECTIONS = 2
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that publishes time spent on checkout of connections, including waiting for a free one,
+    metrics are prefixed with logging name of the pool
+    """
+
+    def connect(self) -> PoolProxiedConnection:
+        name = self.logging_name or "db"
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.inc(f"{name}_pool_timeouts")
+            raise
+        finally:
+            metrics.inc(f"{name}_pool_checkouts")
+            metrics.inc(f"{name}_pool_checkout_seconds", time.perf_counter() - start)
+
+
+def register_pool_metrics(engine: AsyncEngine, name: str) -> None:
+    """
+    Publish usage of connection pool of engine as gauges
+    :param engine: engine
+    :param name: prefix of metrics
+    :return: nothing
+    """
+    # pool is replaced on dispose, so it is looked up on every read
+    metrics.register_gauge(f"{name}_pool_size", lambda: engine.pool.size())
+    metrics.register_gauge(f"{name}_pool_checked_out", lambda: engine.pool.checkedout())
+    metrics.register_gauge(f"{name}_pool_idle", lambda: engine.pool.checkedin())
+    metrics.register_gauge(f"{name}_pool_overflow", lambda: max(engine.pool.overflow(), 0))
+
+
+def connections_per_worker(max_connections: int, reserved_connections: int, workers: int) -> int:
+    """
+    Number of connections each worker may hold without exhausting connections of database
+    :param max_connections: max_connections of database
+    :param reserved_connections: connections reserved for superusers and other clients
+    :param workers: number of worker processes
+    :return: maximum of connections of all pools of the worker
+    """
+    return max((max_connections - reserved_connections) // max(workers, 1), 1)
+
+
+async def check_pool_sizing(engine: AsyncEngine) -> None:
+    """
+    Log pool sizing guidance for the worker based on max_connections of database and number of workers,
+    warns if configured pools may exhaust connections
+    :param engine: engine connected to database
+    :return: nothing
+    """
+    try:
+        async with engine.connect() as connection:
+            max_connections = int((await connection.execute(sa.text("SHOW max_connections"))).scalar())
+            reserved = int((await connection.execute(sa.text("SHOW superuser_reserved_connections"))).scalar())
+    except Exception as error:
+        logger.error(f"Pool sizing is not checked, database is not available: {error!r}")
+        return
+    budget = connections_per_worker(max_connections, reserved, settings.DB_WORKERS)
+    configured = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW + SERVICE_CONNECTIONS
+    message = (
+        f"Database allows {max_connections} connections ({reserved} reserved) for {settings.DB_WORKERS} workers: "
+        f"up to {budget} connections per worker, configured {configured} "
+        f"(DB_POOL_SIZE + DB_MAX_OVERFLOW + {SERVICE_CONNECTIONS} for background services)"
+    )
+    if configured > budget:
+        logger.warning(f"{message}, reduce DB_MAX_OVERFLOW or DB_POOL_SIZE to fit")
+    else:
+        logger.info(message)
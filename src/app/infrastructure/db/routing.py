@@ -0,0 +1,84 @@
+import inspect
+import random
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Sequence
+from uuid import UUID
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from app.common import settings
+from app.common.redis import r as store
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+# Database the statements of the current task are routed to
+db_route: ContextVar[str] = ContextVar("db_route", default=PRIMARY)
+
+
+class RoutingSession(Session):
+    """
+    Session that routes statements to replica while db_route is set to replica, and to primary otherwise,
+    replica is chosen once per session, so that all reads of the session see the same snapshot
+    """
+
+    def __init__(self, primary: Engine, replicas: Sequence[Engine] = (), **kwargs: Any):
+        # AsyncSession passes its own bind, which is None for sessionmaker without engine
+        kwargs.pop("bind", None)
+        super().__init__(bind=primary, **kwargs)
+        self.replica = random.choice(replicas) if replicas else None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs: Any) -> Engine:
+        if self.replica is not None and db_route.get() == REPLICA:
+            return self.replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+def pin_key(user_id: UUID) -> str:
+    return f"db:pin:{user_id}"
+
+
+async def pin_to_primary(*user_ids: UUID) -> None:
+    """
+    Route reads of users to primary for DB_PRIMARY_PIN_WINDOW seconds after write,
+    so that users read changes while replicas catch up
+    :param user_ids: ids of user who made changes and of owners of changed orders
+    :return: nothing
+    """
+    if not settings.replica_urls:
+        return
+    async with store.pipeline(transaction=False) as pipe:
+        for user_id in set(user_ids):
+            pipe.set(pin_key(user_id), 1, ex=settings.DB_PRIMARY_PIN_WINDOW)
+        await pipe.execute()
+
+
+async def is_pinned(user_id: UUID) -> bool:
+    return bool(await store.exists(pin_key(user_id)))
+
+
+def read_only(method):
+    """
+    Decorator of repository methods which only read data, routes them to replica unless
+    replicas are not configured, session is already in transaction (e.g. after write)
+    or user passed as argument "user" recently made changes (see pin_to_primary)
+    """
+    signature = inspect.signature(method)
+
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        session = self.session.sync_session
+        if not isinstance(session, RoutingSession) or session.replica is None or self.session.in_transaction():
+            return await method(self, *args, **kwargs)
+        user = signature.bind(self, *args, **kwargs).arguments.get("user")
+        if user is not None and await is_pinned(user.user_id):
+            return await method(self, *args, **kwargs)
+        token = db_route.set(REPLICA)
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            db_route.reset(token)
+
+    return wrapper
@@ -1,4 +1,4 @@
-from collections.abc import Callable, AsyncGenerator
+from collections.abc import Callable, AsyncGenerator, Sequence
 
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
@@ -7,19 +7,41 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
 )
 
-from app.common import logger
+from app.common import logger, settings
+from app.infrastructure.db.pool import TimedQueuePool, register_pool_metrics
+from app.infrastructure.db.routing import RoutingSession
 
 
-def async_engine(url: str) -> AsyncEngine:
+def async_engine(url: str, name: str = "db", **options) -> AsyncEngine:
+    """
+    Create engine configured by settings
+    :param url: database url
+    :param name: name of the engine, prefix of metrics of its pool
+    :param options: options of create_async_engine overriding settings, e.g. size of pool
+    :return: engine
+    """
     logger.info(f"async_engine created, url {url}")
-    return create_async_engine(
+    engine = create_async_engine(
         url,
-        pool_pre_ping=True,
-        isolation_level="REPEATABLE READ",
-        future=True,
-        connect_args={"timeout": 60},
-        echo=False,
+        **{
+            "poolclass": TimedQueuePool,
+            "pool_logging_name": name,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "isolation_level": settings.DB_ISOLATION_LEVEL,
+            "connect_args": {
+                "timeout": settings.DB_CONNECT_TIMEOUT,
+                "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            },
+            "echo": False,
+            **options,
+        },
     )
+    register_pool_metrics(engine, name)
+    return engine
 
 
 def async_session(engine) -> async_sessionmaker[AsyncSession]:
@@ -27,11 +49,39 @@ def async_session(engine) -> async_sessionmaker[AsyncSession]:
     return async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
 
 
-def session_factory(url: str) -> Callable[..., AsyncGenerator]:
-    _session = async_session(async_engine(url))
+def routing_session(engine: AsyncEngine, replicas: Sequence[AsyncEngine]) -> async_sessionmaker[AsyncSession]:
+    """
+    Sessionmaker of sessions that route read-only repository methods to replicas, see routing.read_only
+    :param engine: engine of primary
+    :param replicas: engines of replicas
+    :return: sessionmaker
+    """
+    logger.info(f"routing sessionmaker created, replicas {len(replicas)}")
+    return async_sessionmaker(
+        expire_on_commit=False,
+        autoflush=False,
+        sync_session_class=RoutingSession,
+        primary=engine.sync_engine,
+        replicas=[replica.sync_engine for replica in replicas],
+    )
+
+
+def app_sessionmaker(url: str, replica_urls: Sequence[str] = ()) -> async_sessionmaker[AsyncSession]:
+    """
+    Sessionmaker of the app, sessions route reads to replicas if there are any
+    :param url: database url of primary
+    :param replica_urls: database urls of replicas
+    :return: sessionmaker
+    """
+    if replica_urls:
+        replicas = [async_engine(replica_url, name=f"replica{i}_db") for i, replica_url in enumerate(replica_urls)]
+        return routing_session(async_engine(url), replicas)
+    return async_session(async_engine(url))
+
 
+def session_factory(sessions: async_sessionmaker[AsyncSession]) -> Callable[..., AsyncGenerator]:
     async def get_session() -> AsyncGenerator:
-        async with _session() as session:
+        async with sessions() as session:
             logger.info("session created")
             yield session
         logger.info("session closed")
@@ -0,0 +1,54 @@
+import asyncio
+import random
+from functools import wraps
+
+from sqlalchemy.exc import DBAPIError
+
+from app.common import logger, settings
+from app.common.metrics import metrics
+
+# serialization_failure and deadlock_detected, transaction may succeed if it is repeated
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+def is_retryable(error: DBAPIError) -> bool:
+    sqlstate = getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+    return sqlstate in RETRYABLE_SQLSTATES
+
+
+def transactional(isolation_level: str | None = None, retries: int | None = None):
+    """
+    Decorator of repository methods that run in their own transaction, the method is expected to commit
+    Sets isolation level of the transaction (default of engine - settings.DB_ISOLATION_LEVEL - otherwise)
+    and repeats the method with rolled back session if transaction fails with serialization error or deadlock
+    If session is already in transaction when method is called, method joins it as is, without retries
+
+    :param isolation_level: isolation level of the transaction, e.g. "REPEATABLE READ"
+    :param retries: maximum number of repeats, settings.DB_TRANSACTION_RETRIES by default
+    """
+    def wrapped(method):
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            if self.session.in_transaction():
+                return await method(self, *args, **kwargs)
+            max_retries = settings.DB_TRANSACTION_RETRIES if retries is None else retries
+            attempt = 0
+            while True:
+                try:
+                    if isolation_level is not None:
+                        await self.session.connection(execution_options={"isolation_level": isolation_level})
+                    return await method(self, *args, **kwargs)
+                except DBAPIError as error:
+                    await self.session.rollback()
+                    if not is_retryable(error) or attempt >= max_retries:
+                        raise
+                    attempt += 1
+                    metrics.inc("db_transaction_retries")
+                    # full jitter, so that transactions that conflicted don't collide again
+                    delay = random.uniform(0, settings.DB_RETRY_BASE_DELAY * 2 ** attempt)
+                    logger.warning(f"{method.__qualname__}: transaction failed ({error.orig!r}), retry in {delay:.3f}s")
+                    await asyncio.sleep(delay)
+
+        return wrapper
+
+    return wrapped
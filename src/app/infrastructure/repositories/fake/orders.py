@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Sequence
 from uuid import UUID
@@ -19,10 +20,18 @@ from app.interfaces.repositories.base import MODEL
 from app.orders.schemas import (
     UserData,
     NewOrderWithProductsSchema,
+    OrderCursorSchema,
+    OrderStatusChangeSchema,
     UpdateOrderWithProductsSchema,
 )
 
 
+def set_totals(obj: OrderModel) -> None:
+    # totals are maintained by trigger in database
+    obj.total_price = sum((product.price * product.quantity for product in obj.products), Decimal(0))
+    obj.item_count = sum(product.quantity for product in obj.products)
+
+
 class FakeOrderRepository(IOrderRepository, FakeBaseRepository):
     _MODEL: MODEL = OrderModel
 
@@ -39,6 +48,7 @@ class FakeOrderRepository(IOrderRepository, FakeBaseRepository):
             customer_name=data.customer_name,
             status=OrderStatus.PENDING.value,
             is_deleted=False,
+            created_at=datetime.now(timezone.utc),
         )
         for product in data.products:
             nested_obj = ProductModel(
@@ -48,9 +58,14 @@ class FakeOrderRepository(IOrderRepository, FakeBaseRepository):
                 quantity=product.quantity,
             )
             obj.products.append(nested_obj)
+        set_totals(obj)
         await self.create(obj)
         return obj
 
+    async def create_orders_bulk(self, user: UserData, data: list[NewOrderWithProductsSchema]) -> list[MODEL]:
+        logger.info("FakeOrderRepository: Creating new orders with products")
+        return [await self.create_order_with_products(user, order) for order in data]
+
     async def get_order(
             self,
             object_id: UUID,
@@ -70,15 +85,16 @@ class FakeOrderRepository(IOrderRepository, FakeBaseRepository):
             object_id: UUID,
             data: UpdateOrderWithProductsSchema,
             user: UserData,
-    ) -> MODEL:
+    ) -> tuple[MODEL, OrderStatus]:
         logger.info("FakeOrderRepository: Updating existing order with products")
-        await self.get_order(object_id=object_id, user=user)
+        obj = await self.get_order(object_id=object_id, user=user)
         upd_object = self._MODEL(
             uuid=object_id,
-            user_id=user.user_id,
+            user_id=obj.user_id,
             customer_name=data.customer_name,
             status=data.status,
             is_deleted=False,
+            created_at=obj.created_at,
         )
         for product in data.products:
             nested_obj = ProductModel(
@@ -87,8 +103,30 @@ class FakeOrderRepository(IOrderRepository, FakeBaseRepository):
                 quantity=product.quantity,
             )
             upd_object.products.append(nested_obj)
+        set_totals(upd_object)
         await self.update_object(upd_object)
-        return upd_object
+        return upd_object, obj.status
+
+    async def update_orders_status(
+            self,
+            object_ids: list[UUID],
+            status: OrderStatus,
+            user: UserData,
+    ) -> list[OrderStatusChangeSchema]:
+        logger.info("FakeOrderRepository: Changing status of orders")
+        changes = []
+        for obj in self.objects:
+            if (
+                obj.uuid in object_ids
+                and not obj.is_deleted
+                and obj.status != status
+                and (user.is_admin or obj.user_id == user.user_id)
+            ):
+                changes.append(OrderStatusChangeSchema(
+                    uuid=obj.uuid, user_id=obj.user_id, old_status=obj.status, new_status=status,
+                ))
+                obj.status = status
+        return changes
 
     async def filter_orders(
             self,
@@ -100,17 +138,38 @@ class FakeOrderRepository(IOrderRepository, FakeBaseRepository):
             max_price: Decimal | None = None,
             min_total: Decimal | None = None,
             max_total: Decimal | None = None,
+            cursor: OrderCursorSchema | None = None,
     ) -> Sequence[MODEL]:
         logger.info("FakeOrderRepository: Filtering orders")
-        # Only by status
-        return [obj for obj in self.objects
-                if obj.status == status
-                and not obj.is_deleted
-                and (obj.user_id != user.user_id or user.is_admin) # noqa E201, E202
-                ]
 
-    async def soft_delete(self, object_id: UUID, user: UserData) -> None:
+        def matches(obj) -> bool:
+            return (
+                (min_price is None and max_price is None or any(
+                    (min_price is None or product.price >= min_price)
+                    and (max_price is None or product.price <= max_price)
+                    for product in obj.products
+                ))
+                and (min_total is None or obj.total_price >= min_total)
+                and (max_total is None or obj.total_price <= max_total)
+            )
+
+        result = sorted(
+            [obj for obj in self.objects
+             if obj.status == status
+             and not obj.is_deleted
+             and (obj.user_id == user.user_id or user.is_admin)
+             and matches(obj)],
+            key=lambda obj: (obj.created_at, obj.uuid)
+        )
+        if cursor:
+            result = [obj for obj in result if (obj.created_at, obj.uuid) > (cursor.created_at, cursor.uuid)]
+        else:
+            result = result[offset:]
+        return result[:limit]
+
+    async def soft_delete(self, object_id: UUID, user: UserData) -> MODEL:
         logger.info("FakeOrderRepository: Changing flag of the order is_deleted to True")
         obj = await self.get_order(object_id=object_id, user=user)
         obj.is_deleted = True
         await self.update_object(obj)
+        return obj
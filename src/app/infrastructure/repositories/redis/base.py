@@ -1,4 +1,3 @@
-import pickle
 from abc import ABC, abstractmethod
 from datetime import timedelta
 from typing import Any, TypeVar, Union
@@ -7,6 +6,10 @@ from uuid import UUID
 from fastapi import Depends
 from redis.exceptions import ConnectionError
 
+from app.common.codecs import (
+    ICodec,
+    schema_codec,
+)
 from app.common.exceptions import (
     ObjectDoesNotExistException,
     RedisConnectionException,
@@ -35,12 +38,12 @@ class IRedisBaseRepository(IBaseRepository, ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    async def set_with_expiration(self, key: str, obj: MODEL, exp_minutes: int) -> None:
+    async def set_with_expiration(self, key: str, obj: MODEL, exp: Union[int, timedelta]) -> None:
         """
-        Add object wit expiration
+        Add object with expiration
         :param key: key of object to be saved
         :param obj: object of MODEL to be saved
-        :param exp_minutes: number of minutes before expiration
+        :param exp: number of minutes or time before expiration
         :return: nothing
         """
         raise NotImplementedError()
@@ -64,16 +67,21 @@ class RedisBaseRepository(IRedisBaseRepository):
     def __init__(self, *, session: async_session = Depends()):
         self.session = session
 
+    @property
+    def codec(self) -> ICodec[MODEL]:
+        return schema_codec(self._MODEL)
+
     # IRedisBaseRepository methods implementation
     async def set(self, key: str, obj: MODEL) -> None:
         try:
-            await r.set(key, value=pickle.dumps(obj))
+            await r.set(key, value=self.codec.encode(obj))
         except ConnectionError:
             raise RedisConnectionException()
 
-    async def set_with_expiration(self, key: str, obj: MODEL, exp_minutes: int) -> None:
+    async def set_with_expiration(self, key: str, obj: MODEL, exp: Union[int, timedelta]) -> None:
+        expiration = exp if isinstance(exp, timedelta) else timedelta(minutes=exp)
         try:
-            await r.setex(key, timedelta(minutes=exp_minutes), value=pickle.dumps(obj))
+            await r.setex(key, expiration, value=self.codec.encode(obj))
         except ConnectionError:
             raise RedisConnectionException()
 
@@ -82,7 +90,7 @@ class RedisBaseRepository(IRedisBaseRepository):
             data = await r.get(key)
         except ConnectionError:
             raise RedisConnectionException
-        return pickle.loads(data) if data else None
+        return self.codec.decode(data) if data else None
 
     # IBaseRepository Methods Implementation
     async def create(self, obj: MODEL, **kwargs) -> None:
@@ -92,13 +100,9 @@ class RedisBaseRepository(IRedisBaseRepository):
             await self.set(kwargs["key"], obj)
 
     async def get_by_id(self, object_id: UUID) -> MODEL:
-        try:
-            data = await self.get(str(object_id))
-        except ConnectionError:
-            raise RedisConnectionException
-
-        if data:
-            return pickle.loads(data)
+        result = await self.get(str(object_id))
+        if result:
+            return result
         else:
             raise ObjectDoesNotExistException(model=self._MODEL, object_id=object_id)
 
@@ -108,8 +112,5 @@ class RedisBaseRepository(IRedisBaseRepository):
         if not result:
             raise ObjectDoesNotExistException(model=self._MODEL, object_id=object_id)
 
-        try:
-            await self.set(str(object_id), pickle.dumps(values["value"]))
-        except ConnectionError:
-            raise RedisConnectionException
+        await self.set(str(object_id), values["value"])
         return result
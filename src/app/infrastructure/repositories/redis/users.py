@@ -1,12 +1,88 @@
+import hashlib
+from datetime import timedelta
+from typing import Union
+
+from redis.exceptions import ConnectionError
+
+from app.common import settings
+from app.common.exceptions import RedisConnectionException
+from app.common.local_cache import LocalCache
+from app.common.metrics import metrics
+from app.common.redis import (
+    pubsub,
+    r,
+)
 from app.infrastructure.repositories.redis.base import RedisBaseRepository
 from app.interfaces.repositories.base import MODEL
 from app.interfaces.repositories.users import IUserRepository
 from app.users.schemas import TokenPayload
 
+REVOCATION_CHANNEL = "tokens:revoke"
+
+# Validated tokens of recent requests, keyed by hash of token so that tokens are not kept in memory,
+# entries live no longer than the token in Redis and are dropped on revocation by any worker
+token_cache: LocalCache[TokenPayload] = LocalCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    max_bytes=settings.TOKEN_CACHE_MAX_BYTES,
+)
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def revoked_key(token: str) -> str:
+    return f"revoked:{token_key(token)}"
+
+
+async def handle_revocation(message: dict) -> None:
+    token_cache.delete(message["data"].decode())
+
+
+pubsub.subscribe(REVOCATION_CHANNEL, handle_revocation)
+
 
 class UserRepository(IUserRepository, RedisBaseRepository):
     """
     User repository implementation that uses Redis implementation
-    No specific additional methods
+    Payloads of tokens are cached in memory of the worker for at most TOKEN_CACHE_TTL seconds
     """
     _MODEL: MODEL = TokenPayload
+
+    async def get(self, key: str) -> Union[MODEL, None]:
+        cache_key = token_key(key)
+        payload = token_cache.get(cache_key)
+        if payload is not None:
+            metrics.inc("token_cache_hits")
+            return payload
+        metrics.inc("token_cache_misses")
+        try:
+            async with r.pipeline(transaction=False) as pipe:
+                data, ttl = await pipe.get(key).pttl(key).execute()
+        except ConnectionError:
+            raise RedisConnectionException
+        payload = self.codec.decode(data) if data else None
+        if payload is not None:
+            # token without expiration in Redis (ttl -1) is cached for TOKEN_CACHE_TTL
+            local_ttl = settings.TOKEN_CACHE_TTL if ttl < 0 else min(settings.TOKEN_CACHE_TTL, ttl / 1000)
+            token_cache.set(cache_key, payload, ttl=local_ttl, size=len(data))
+        return payload
+
+    async def revoke(self, key: str, exp: timedelta) -> None:
+        cache_key = token_key(key)
+        token_cache.delete(cache_key)
+        try:
+            async with r.pipeline(transaction=False) as pipe:
+                pipe.delete(key).publish(REVOCATION_CHANNEL, cache_key)
+                # expired token is rejected anyway, denylist entry lives only while token is valid
+                if exp.total_seconds() >= 1:
+                    pipe.set(revoked_key(key), 1, ex=exp)
+                await pipe.execute()
+        except ConnectionError:
+            raise RedisConnectionException
+
+    async def is_revoked(self, key: str) -> bool:
+        try:
+            return bool(await r.exists(revoked_key(key)))
+        except ConnectionError:
+            raise RedisConnectionException
@@ -23,6 +23,9 @@ class SQLAlchemyBaseRepository(IBaseRepository):
     def __init__(self, *, session: async_session = Depends()):
         self.session = session
 
+    def with_session(self, session: AsyncSession) -> "SQLAlchemyBaseRepository":
+        return type(self)(session=session)
+
     async def create(self, obj: MODEL, **kwargs) -> Union[MODEL, None]:
         self.session.add(obj)
         await self.session.commit()
@@ -1,19 +1,20 @@
-import asyncio
-import json
-
 from sqlalchemy import event, inspect
 
 from app.common import logger
-from app.common.rabbitmq import publish_message
 from app.events.schemas import StatusChanged
 from app.infrastructure.db.models import OrderModel
+from app.infrastructure.repositories.sqlalchemy.outbox import (
+    add_events,
+    event_values,
+)
 
 
 @event.listens_for(OrderModel, 'before_update')
 def compare_old_and_new_values(mapper, connection, target):
     """
     ORM level signal that listens to changes of objects of OrderModel
-    Send event "StatusChanged" to RabbitMQ when if "status" field is present
+    Write event "StatusChanged" to outbox table if "status" field is changed,
+    event is committed together with the order and relayed to RabbitMQ by OutboxRelay
     """
     logger.info("compare_old_and_new_values")
     tracked_fields = ["status"]
@@ -36,5 +37,4 @@ def compare_old_and_new_values(mapper, connection, target):
             new_status=changes["status"][1],
         )
         logger.info(f"new event: {new_event}")
-        loop = asyncio.get_running_loop()
-        loop.create_task(publish_message(json.dumps(new_event.__dict__)))
+        add_events(connection, [event_values(target.uuid, new_event)])
@@ -1,9 +1,12 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
 from decimal import Decimal
 from typing import Sequence
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import sqlalchemy as sa
-from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.common import (
     logger,
@@ -14,20 +17,95 @@ from app.common.exceptions import (
     NoPermissionException,
     ObjectDoesNotExistException,
 )
+from app.events.schemas import StatusChanged
 from app.infrastructure.db.models import (
+    OrderEventModel,
     OrderModel,
     ProductModel,
 )
+from app.infrastructure.db.routing import read_only
+from app.infrastructure.db.transactions import transactional
 from app.infrastructure.repositories.sqlalchemy.base import (
     SQLAlchemyBaseRepository,
     MODEL,
 )
+from app.infrastructure.repositories.sqlalchemy.outbox import event_values
 from app.interfaces.repositories.orders import IOrderRepository
 from app.orders.schemas import (
     NewOrderWithProductsSchema,
+    OrderCursorSchema,
+    OrderStatusChangeSchema,
     UpdateOrderWithProductsSchema,
     UserData,
 )
+from app.products.schemas import NewProductSchema
+
+
+@dataclass
+class ProductsDiff:
+    """
+    Changes that turn stored products of the order into new ones
+    """
+    kept: list[ProductModel] = field(default_factory=list)
+    updated: list[tuple[ProductModel, NewProductSchema]] = field(default_factory=list)
+    inserted: list[NewProductSchema] = field(default_factory=list)
+    deleted: list[ProductModel] = field(default_factory=list)
+    # stored product matched to each new product, None for inserted ones
+    matched: list[ProductModel | None] = field(default_factory=list)
+
+    def products(self, inserted: Sequence[ProductModel]) -> list[ProductModel]:
+        """
+        Products of the order after the change in order of new products
+        :param inserted: models of inserted products in order of self.inserted
+        :return: list of products
+        """
+        inserted = iter(inserted)
+        return [product if product is not None else next(inserted) for product in self.matched]
+
+
+def diff_products(stored: Sequence[ProductModel], new: Sequence[NewProductSchema]) -> ProductsDiff:
+    """
+    Match new products to stored ones: equal products are kept, products with the same name are updated,
+    the rest of new products are inserted and the rest of stored products are deleted
+    :param stored: products of the order in database
+    :param new: products of the order from request
+    :return: diff of products
+    """
+    diff = ProductsDiff(matched=[None] * len(new))
+    by_values = defaultdict(list)
+    for product in stored:
+        by_values[(product.name, product.price, product.quantity)].append(product)
+    unmatched = []
+    for i, product in enumerate(new):
+        same = by_values[(product.name, product.price, product.quantity)]
+        if same:
+            diff.matched[i] = same.pop()
+            diff.kept.append(diff.matched[i])
+        else:
+            unmatched.append((i, product))
+
+    by_name = defaultdict(list)
+    for products in by_values.values():
+        for product in products:
+            by_name[product.name].append(product)
+    for i, product in unmatched:
+        same_name = by_name[product.name]
+        if same_name:
+            diff.matched[i] = same_name.pop()
+            diff.updated.append((diff.matched[i], product))
+        else:
+            diff.inserted.append(product)
+    diff.deleted = [product for products in by_name.values() for product in products]
+    return diff
+
+
+def set_totals(obj: OrderModel) -> None:
+    """
+    Set totals of the order maintained by trigger in database from its products,
+    so that they are not loaded again after products are saved
+    """
+    set_committed_value(obj, "total_price", sum((p.price * p.quantity for p in obj.products), Decimal(0)))
+    set_committed_value(obj, "item_count", sum(p.quantity for p in obj.products))
 
 
 class OrderRepository(IOrderRepository, SQLAlchemyBaseRepository):
@@ -48,52 +126,182 @@ class OrderRepository(IOrderRepository, SQLAlchemyBaseRepository):
             )
             obj.products.append(nested_obj)
         await self.create(obj)
+        set_totals(obj)
         return obj
 
+    async def create_orders_bulk(self, user: UserData, data: list[NewOrderWithProductsSchema]) -> list[MODEL]:
+        logger.info(f"OrderRepository: Creating {len(data)} new orders with products")
+        # rows are inserted with multi-row INSERT statements (batched by insertmanyvalues of SQLAlchemy),
+        # one statement per batch of orders and per batch of products, in one transaction
+        orders = list((await self.session.scalars(
+            sa.insert(OrderModel).returning(OrderModel, sort_by_parameter_order=True),
+            [
+                dict(
+                    uuid=uuid4(),
+                    user_id=user.user_id,
+                    customer_name=order.customer_name,
+                    status=OrderStatus.PENDING.value,
+                    is_deleted=False,
+                )
+                for order in data
+            ],
+        )).all())
+        product_values = [
+            dict(order_uuid=obj.uuid, name=product.name, price=product.price, quantity=product.quantity)
+            for obj, order in zip(orders, data)
+            for product in order.products or []
+        ]
+        products = defaultdict(list)
+        if product_values:
+            resp = await self.session.scalars(
+                sa.insert(ProductModel).returning(ProductModel, sort_by_parameter_order=True),
+                product_values,
+            )
+            for product in resp.all():
+                products[product.order_uuid].append(product)
+        await self.session.commit()
+
+        for obj in orders:
+            set_committed_value(obj, "products", products[obj.uuid])
+            set_totals(obj)
+        return orders
+
+    @read_only
     async def get_order(
             self,
             object_id: UUID,
             user: UserData,
     ) -> MODEL:
+        return await self._get_order(object_id=object_id, user=user)
+
+    async def _get_order(self, object_id: UUID, user: UserData) -> MODEL:
         logger.info("OrderRepository: Get one order with permission check")
-        stmt = sa.select(OrderModel).join(ProductModel).where(
-            OrderModel.is_deleted == False,  # noqa E712, E225
-            OrderModel.uuid == object_id)
-        resp = await self.session.execute(stmt)
-        obj = resp.scalar()
+        resp = await self.session.execute(self.get_order_stmt(object_id, user))
+        obj = resp.unique().scalar()
         if not obj:
             raise ObjectDoesNotExistException(model=self._MODEL, object_id=object_id)
 
         if not user.is_admin and obj.user_id != user.user_id:
             order_logger.info(f"NoPermissionException {user} object_id {object_id}")
+            # products of the order are not loaded for this user, don't keep incomplete order in session
+            self.session.expunge(obj)
             raise NoPermissionException(object_id)
         return obj
 
+    # order is read and written in one snapshot, concurrent update of the order fails and is repeated
+    @transactional(isolation_level="REPEATABLE READ")
     async def update_order_with_products(
             self,
             object_id: UUID,
             data: UpdateOrderWithProductsSchema,
             user: UserData,
-    ) -> MODEL:
+    ) -> tuple[MODEL, OrderStatus]:
         logger.info("OrderRepository: Updating existing order with products")
-        upd_object = await self.get_order(object_id=object_id, user=user)
+        # order to be changed is always read from primary
+        upd_object = await self._get_order(object_id=object_id, user=user)
+        old_status = upd_object.status
 
         upd_object.customer_name = data.customer_name
         upd_object.status = data.status
-        new_products = []
-        for new_product in data.products:
-            new_products.append(ProductModel(
-                name=new_product.name,
-                price=new_product.price,
-                quantity=new_product.quantity,
-            ))
-        upd_object.products = new_products
-        self.session.add(upd_object)
+        # only changed products are written, with one statement per kind of change,
+        # order itself is flushed by ORM so that its changes are tracked by listeners
+        diff = diff_products(upd_object.products, data.products)
+        inserted = []
+        if diff.inserted:
+            resp = await self.session.scalars(
+                sa.insert(ProductModel).returning(ProductModel, sort_by_parameter_order=True),
+                [
+                    dict(order_uuid=object_id, name=product.name, price=product.price, quantity=product.quantity)
+                    for product in diff.inserted
+                ],
+            )
+            inserted = list(resp.all())
+        if diff.updated:
+            await self.session.execute(
+                sa.update(ProductModel),
+                [
+                    dict(uuid=stored.uuid, price=product.price, quantity=product.quantity)
+                    for stored, product in diff.updated
+                ],
+            )
+        if diff.deleted:
+            await self.session.execute(
+                sa.delete(ProductModel).where(ProductModel.uuid.in_([product.uuid for product in diff.deleted]))
+            )
         await self.session.commit()
-        return upd_object
 
-    async def filter_orders(
+        for stored, product in diff.updated:
+            set_committed_value(stored, "price", product.price)
+            set_committed_value(stored, "quantity", product.quantity)
+        set_committed_value(upd_object, "products", diff.products(inserted))
+        set_totals(upd_object)
+        return upd_object, old_status
+
+    # concurrent batches may deadlock on rows of the same orders
+    @transactional()
+    async def update_orders_status(
             self,
+            object_ids: list[UUID],
+            status: OrderStatus,
+            user: UserData,
+    ) -> list[OrderStatusChangeSchema]:
+        logger.info(f"OrderRepository: Changing status of {len(object_ids)} orders")
+        # old status is taken from locked rows, since RETURNING of UPDATE returns only new values
+        old = sa.select(
+            OrderModel.uuid, OrderModel.status,
+        ).where(
+            OrderModel.uuid.in_(object_ids),
+            OrderModel.is_deleted == False,  # noqa E712, E225
+            OrderModel.status != status,
+        )
+        if not user.is_admin:
+            old = old.where(OrderModel.user_id == user.user_id)
+        # rows are locked in the same order by all batches to make deadlocks rare
+        old = old.order_by(OrderModel.uuid).with_for_update().subquery("old")
+        stmt = sa.update(OrderModel).where(
+            OrderModel.uuid == old.c.uuid
+        ).values(
+            status=status
+        ).returning(
+            OrderModel.uuid, OrderModel.user_id, old.c.status.label("old_status")
+        ).execution_options(synchronize_session=False)
+        changes = [
+            OrderStatusChangeSchema(uuid=row.uuid, user_id=row.user_id, old_status=row.old_status, new_status=status)
+            for row in await self.session.execute(stmt)
+        ]
+        # rows are updated without ORM, so events are saved here instead of listener, in the same transaction
+        if changes:
+            await self.session.execute(sa.insert(OrderEventModel.__table__), [
+                event_values(change.uuid, StatusChanged(
+                    order_id=str(change.uuid),
+                    old_status=change.old_status,
+                    new_status=change.new_status,
+                ))
+                for change in changes
+            ])
+        await self.session.commit()
+        return changes
+
+    @staticmethod
+    def get_order_stmt(object_id: UUID, user: UserData) -> sa.Select:
+        """
+        Statement of get_order, order and its products are loaded in one query, products are joined
+        only if user may see them, order row itself is loaded anyway to tell missing order from order of another user
+        """
+        join_condition = ProductModel.order_uuid == OrderModel.uuid
+        if not user.is_admin:
+            join_condition = sa.and_(join_condition, OrderModel.user_id == user.user_id)
+        return sa.select(OrderModel).outerjoin(
+            ProductModel, join_condition
+        ).where(
+            OrderModel.is_deleted == False,  # noqa E712, E225
+            OrderModel.uuid == object_id
+        ).options(
+            contains_eager(OrderModel.products)
+        ).execution_options(populate_existing=True)
+
+    @staticmethod
+    def filter_orders_stmt(
             user: UserData,
             limit: int = 10,
             offset: int = 0,
@@ -102,13 +310,15 @@ class OrderRepository(IOrderRepository, SQLAlchemyBaseRepository):
             max_price: Decimal | None = None,
             min_total: Decimal | None = None,
             max_total: Decimal | None = None,
-    ) -> Sequence[MODEL]:
-        logger.info("OrderRepository: Filtering orders")
-
+            cursor: OrderCursorSchema | None = None,
+    ) -> sa.Select:
+        """
+        Statement of filter_orders, products are not joined to orders, so that each order is selected once
+        and limit is applied to orders: price bounds are checked with EXISTS,
+        total bounds - with total of the order maintained by trigger
+        """
         stmt = sa.select(
             OrderModel,
-        ).join(
-            ProductModel
         ).where(
             OrderModel.status == status,
             OrderModel.is_deleted == False  # noqa E712, E225
@@ -117,23 +327,77 @@ class OrderRepository(IOrderRepository, SQLAlchemyBaseRepository):
             stmt = stmt.where(
                 OrderModel.user_id == user.user_id
             )
-        if min_price and max_price:
+        if min_price is not None or max_price is not None:
+            products = sa.select(ProductModel.uuid).where(ProductModel.order_uuid == OrderModel.uuid)
+            if min_price is not None:
+                products = products.where(ProductModel.price >= min_price)
+            if max_price is not None:
+                products = products.where(ProductModel.price <= max_price)
+            stmt = stmt.where(products.exists())
+        if min_total is not None:
+            stmt = stmt.where(OrderModel.total_price >= min_total)
+        if max_total is not None:
+            stmt = stmt.where(OrderModel.total_price <= max_total)
+        stmt = stmt.order_by(OrderModel.created_at, OrderModel.uuid).limit(limit)
+        if cursor:
             stmt = stmt.where(
-                ProductModel.price >= min_price,
-                ProductModel.price <= max_price,
+                sa.tuple_(OrderModel.created_at, OrderModel.uuid) > (cursor.created_at, cursor.uuid)
             )
-        if min_total and max_total:
-            stmt = stmt.group_by(
-                OrderModel.uuid
-            ).having(
-                func.sum(ProductModel.price * ProductModel.quantity) >= min_total,
-                func.sum(ProductModel.price * ProductModel.quantity) <= max_total,
-            )
-        stmt = stmt.limit(limit).offset(offset)
+        else:
+            stmt = stmt.offset(offset)
+        return stmt
+
+    @read_only
+    async def filter_orders(
+            self,
+            user: UserData,
+            limit: int = 10,
+            offset: int = 0,
+            status: OrderStatus = OrderStatus.PENDING.value,
+            min_price: Decimal | None = None,
+            max_price: Decimal | None = None,
+            min_total: Decimal | None = None,
+            max_total: Decimal | None = None,
+            cursor: OrderCursorSchema | None = None,
+    ) -> Sequence[MODEL]:
+        logger.info("OrderRepository: Filtering orders")
+        stmt = self.filter_orders_stmt(
+            user=user, limit=limit, offset=offset, status=status,
+            min_price=min_price, max_price=max_price,
+            min_total=min_total, max_total=max_total,
+            cursor=cursor,
+        )
         resp = await self.session.execute(stmt)
         return resp.scalars().all()
 
-    async def soft_delete(self, object_id: UUID, user: UserData) -> None:
+    async def soft_delete(self, object_id: UUID, user: UserData) -> MODEL:
         logger.info("OrderRepository: Changing flag of the order is_deleted to True")
-        await self.get_order(object_id=object_id, user=user)
-        await self.update(object_id=object_id, is_deleted=True)
+        # one statement finds the order and deletes it if user may do it,
+        # found order is returned anyway to tell missing order from order of another user
+        target = sa.select(
+            OrderModel.uuid, OrderModel.user_id, OrderModel.status,
+        ).where(
+            OrderModel.uuid == object_id,
+            OrderModel.is_deleted == False  # noqa E712, E225
+        ).cte("target")
+        deleted = sa.update(OrderModel).where(
+            OrderModel.uuid == target.c.uuid,
+            OrderModel.is_deleted == False  # noqa E712, E225
+        )
+        if not user.is_admin:
+            deleted = deleted.where(target.c.user_id == user.user_id)
+        deleted = deleted.values(is_deleted=True).returning(OrderModel.uuid).cte("deleted")
+        stmt = sa.select(
+            target.c.uuid, target.c.user_id, target.c.status, deleted.c.uuid.label("deleted_uuid"),
+        ).select_from(
+            target.outerjoin(deleted, sa.true())
+        )
+        row = (await self.session.execute(stmt)).first()
+        await self.session.commit()
+
+        if row is not None and not user.is_admin and row.user_id != user.user_id:
+            order_logger.info(f"NoPermissionException {user} object_id {object_id}")
+            raise NoPermissionException(object_id)
+        if row is None or row.deleted_uuid is None:
+            raise ObjectDoesNotExistException(model=self._MODEL, object_id=object_id)
+        return self._MODEL(uuid=row.uuid, user_id=row.user_id, status=row.status, is_deleted=True)
@@ -0,0 +1,70 @@
+from dataclasses import asdict
+from typing import Sequence
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+from app.events.schemas import Event
+from app.infrastructure.db.models import OrderEventModel
+from app.infrastructure.repositories.sqlalchemy.base import (
+    SQLAlchemyBaseRepository,
+    MODEL,
+)
+
+
+def event_values(order_uuid: UUID, event: Event) -> dict:
+    """
+    Convert event to values of outbox row
+    :param order_uuid: uuid of the order event relates to
+    :param event: event to be saved
+    :return: values for insert statement
+    """
+    return {
+        "order_uuid": order_uuid,
+        "event_type": type(event).__name__,
+        "payload": asdict(event),
+    }
+
+
+def add_events(connection: Connection, values: list[dict]) -> None:
+    """
+    Write events to outbox within transaction of the given connection
+    :param connection: connection of the current transaction
+    :param values: list of outbox rows, see event_values
+    :return: nothing
+    """
+    if values:
+        connection.execute(sa.insert(OrderEventModel.__table__), values)
+
+
+class OutboxRepository(SQLAlchemyBaseRepository):
+    """
+    Repository used by outbox relay to drain pending events
+    """
+    _MODEL: MODEL = OrderEventModel
+
+    async def fetch_pending(self, limit: int) -> Sequence[MODEL]:
+        """
+        Lock batch of not yet published events, events locked by another relay are skipped
+        :param limit: maximum number of events in batch
+        :return: list of events in order of creation
+        """
+        stmt = sa.select(OrderEventModel).where(
+            OrderEventModel.published_at.is_(None)
+        ).order_by(
+            OrderEventModel.created_at, OrderEventModel.uuid
+        ).limit(limit).with_for_update(skip_locked=True)
+        resp = await self.session.execute(stmt)
+        return resp.scalars().all()
+
+    async def mark_published(self, object_ids: list[UUID]) -> None:
+        """
+        Mark events as published, doesn't commit
+        :param object_ids: uuids of published events
+        :return: nothing
+        """
+        stmt = sa.update(OrderEventModel).where(
+            OrderEventModel.uuid.in_(object_ids)
+        ).values(published_at=sa.func.now())
+        await self.session.execute(stmt)
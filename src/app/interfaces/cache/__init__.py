@@ -0,0 +1,5 @@
+from app.interfaces.cache.orders import IOrderCache
+
+__all__ = [
+    "IOrderCache",
+]
@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+from typing import Iterable
+from uuid import UUID
+
+from app.common.enums import OrderStatus
+from app.orders.schemas import OrderStatusChangeSchema
+
+
+class IOrderCache(ABC):
+    """
+    Invalidation of cached orders and order listings changed by the service
+    """
+
+    @abstractmethod
+    async def invalidate_listings(self, user_id: UUID, statuses: Iterable[OrderStatus]) -> None:
+        """
+        Delete cached listings that may contain orders of user with given statuses
+        :param user_id: id of user who owns the changed orders
+        :param statuses: statuses of the changed orders before and after change
+        :return: nothing
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def invalidate_status_changes(self, changes: Iterable[OrderStatusChangeSchema]) -> None:
+        """
+        Delete cached orders whose status was changed and listings affected by the change
+        :param changes: changes of status of orders
+        :return: nothing
+        """
+        raise NotImplementedError()
@@ -40,3 +40,12 @@ class IBaseRepository(ABC):
         :return: updated object of corresponding Model
         """
         raise NotImplementedError
+
+    def with_session(self, session: Any) -> "IBaseRepository":
+        """
+        Repository of the same kind working in given session instead of the session of request,
+        e.g. for background tasks; repositories not backed by database return themselves
+        :param session: session to be used by repository
+        :return: repository
+        """
+        return self
@@ -7,6 +7,8 @@ from app.interfaces.repositories.base import IBaseRepository
 from app.interfaces.repositories.base import MODEL
 from app.orders.schemas import (
     NewOrderWithProductsSchema,
+    OrderCursorSchema,
+    OrderStatusChangeSchema,
     UpdateOrderWithProductsSchema,
     UserData,
 )
@@ -31,6 +33,20 @@ class IOrderRepository(IBaseRepository, ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    async def create_orders_bulk(
+            self,
+            user: UserData,
+            data: list[NewOrderWithProductsSchema],
+    ) -> list[MODEL]:
+        """
+        Create new orders with nested product objects in one transaction
+        :param user: authenticated user data, id and is_admin
+        :param data: list of request data with order data
+        :return: list of Order objects in order of data
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     async def get_order(
             self,
@@ -51,13 +67,30 @@ class IOrderRepository(IBaseRepository, ABC):
             object_id: UUID,
             data: UpdateOrderWithProductsSchema,
             user: UserData
-    ) -> MODEL:
+    ) -> tuple[MODEL, OrderStatus]:
         """
         Replaces existing order with nested product objects
         :param object_id: uuid of order
         :param data: request data with new order data
         :param user: authenticated user data, id and is_admin
-        :return: updated Order object
+        :return: updated Order object and its status before update
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def update_orders_status(
+            self,
+            object_ids: list[UUID],
+            status: OrderStatus,
+            user: UserData,
+    ) -> list[OrderStatusChangeSchema]:
+        """
+        Change status of orders and save event "StatusChanged" of each changed order,
+        orders that are missing, deleted, not accessible to user or already have the status are skipped
+        :param object_ids: uuids of orders
+        :param status: new status
+        :param user: authenticated user data, id and is_admin, admin has access to all orders, user - only to their own
+        :return: list of changes of orders
         """
         raise NotImplementedError()
 
@@ -72,18 +105,21 @@ class IOrderRepository(IBaseRepository, ABC):
             max_price: Decimal | None = None,
             min_total: Decimal | None = None,
             max_total: Decimal | None = None,
+            cursor: OrderCursorSchema | None = None,
     ) -> list[MODEL]:
         """
-        Filters orders according to parameters
+        Filters orders according to parameters, orders are sorted by creation time
         :param user: authenticated user data, id and is_admin; if user is not admin,
             only orders created by this user will be filtered
         :param limit: maximum number of orders to return
-        :param offset: offset of orders
+        :param offset: offset of orders, ignored if cursor is provided
         :param status: status of orders
         :param min_price: minimum price of orders
         :param max_price: maximum price of orders
         :param min_total: minimum total price of orders
         :param max_total: maximum total price of orders
+        :param cursor: position of the last order of the previous page,
+            orders after it are returned (keyset pagination)
         :return: filtered list of Order objects
         """
         raise NotImplementedError
@@ -93,11 +129,11 @@ class IOrderRepository(IBaseRepository, ABC):
             self,
             object_id: UUID,
             user: UserData,
-    ) -> None:
+    ) -> MODEL:
         """
         Sets flag is_deleted to True
         :param object_id: uuid of the order to be deleted
         :param user: authenticated user data, id and is_admin
-        :return: nothing
+        :return: deleted Order object
         """
         raise NotImplementedError
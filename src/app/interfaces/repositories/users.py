@@ -1,4 +1,5 @@
-from abc import ABC
+from abc import ABC, abstractmethod
+from datetime import timedelta
 
 from app.infrastructure.repositories.redis.base import IRedisBaseRepository
 
@@ -6,6 +7,24 @@ from app.infrastructure.repositories.redis.base import IRedisBaseRepository
 class IUserRepository(IRedisBaseRepository, ABC):
     """
     User repository interface
-    No specific additional methods
     """
-    pass
+
+    @abstractmethod
+    async def revoke(self, key: str, exp: timedelta) -> None:
+        """
+        Delete token and deny it until it expires, so that it is not accepted by any worker
+        even if it is still valid for local verification or auth service
+        :param key: token
+        :param exp: time before token expires
+        :return: nothing
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def is_revoked(self, key: str) -> bool:
+        """
+        Check if token was revoked
+        :param key: token
+        :return: True if token is denied
+        """
+        raise NotImplementedError()
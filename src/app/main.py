@@ -3,11 +3,12 @@ import fastapi as fa
 from app.common import settings
 from app.common.dependencies import bind_dependencies
 from app.common.exceptions.register import register_exception_handler
+from app.common.lifespan import lifespan_factory
 from app.common.routers import bind_routers
 
 
 def setup_application(db_url: str = settings.db_url):
-    app_ = fa.FastAPI()
+    app_ = fa.FastAPI(lifespan=lifespan_factory(db_url))
 
     bind_routers(app=app_)
 
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from app.common.metrics import metrics
+
+metrics_router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@metrics_router.get("")
+async def get_metrics() -> dict[str, float]:
+    return metrics.snapshot()
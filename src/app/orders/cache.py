@@ -1,49 +1,376 @@
-import pickle
-from functools import wraps
+import asyncio
+import hashlib
+import inspect
+from functools import partial, wraps
+from typing import Any, Iterable
+from uuid import UUID, uuid4
 
 from redis.exceptions import ConnectionError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.common import logger
-from app.common.redis import r as store
+from app.common import logger, order_logger, settings
+from app.common.codecs import ICodec, schema_codec
+from app.common.enums import OrderStatus
+from app.common.exceptions import NoPermissionException
+from app.common.local_cache import LocalCache
+from app.common.metrics import metrics
+from app.common.redis import (
+    pubsub,
+    r as store,
+)
+from app.common.singleflight import SingleFlight
 
+INVALIDATION_CHANNEL = "order_cache:invalidate"
 
-def order_cache(expiration: int = None, update: bool = False, delete: bool = False):
+# Deletes listing keys saved under given tags and the tags themselves in one call
+INVALIDATE_TAGS_SCRIPT = """
+for _, tag in ipairs(KEYS) do
+    local keys = redis.call('SMEMBERS', tag)
+    for i = 1, #keys, 1000 do
+        redis.call('DEL', unpack(keys, i, math.min(i + 999, #keys)))
+    end
+    redis.call('DEL', tag)
+end
+return #KEYS
+"""
+invalidate_tags_script = store.register_script(INVALIDATE_TAGS_SCRIPT)
+
+# Deletes lock only if it is still held by the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+release_lock_script = store.register_script(RELEASE_LOCK_SCRIPT)
+
+# In-process tier (L1) in front of Redis (L2), shared by all decorated endpoints of the worker,
+# keeps decoded objects, size is accounted by the size of encoded data
+local_store: LocalCache[Any] = LocalCache(
+    max_entries=settings.ORDER_CACHE_L1_MAX_ENTRIES,
+    max_bytes=settings.ORDER_CACHE_L1_MAX_BYTES,
+)
+# Identifies this worker in invalidation messages to skip its own messages
+worker_id = uuid4().hex
+# Concurrent cache misses of the same key within the worker share one load
+flights: SingleFlight[Any] = SingleFlight()
+# Background refreshes of stale values, limited per worker
+refreshes: set[asyncio.Task] = set()
+# Sessionmaker of background refreshes, request session is closed when the response is sent,
+# bound on start of the app by bind_dependencies
+refresh_sessions: async_sessionmaker[AsyncSession] | None = None
+
+
+def bind_refresh_sessions(sessions: async_sessionmaker[AsyncSession]) -> None:
+    global refresh_sessions
+    refresh_sessions = sessions
+
+
+async def invalidate(key: str) -> None:
+    """
+    Remove key from the in-process tier of this worker and notify other workers
+    :param key: cache key
+    :return: nothing
+    """
+    local_store.delete(key)
+    if settings.ORDER_CACHE_L1_ENABLED:
+        await store.publish(INVALIDATION_CHANNEL, f"{worker_id}:{key}")
+
+
+async def handle_invalidation(message: dict) -> None:
+    sender, key = message["data"].decode().split(":", 1)
+    if sender != worker_id:
+        local_store.delete(key)
+
+
+pubsub.subscribe(INVALIDATION_CHANNEL, handle_invalidation)
+
+
+def listing_key(user, filter_query) -> str:
+    """
+    Key of cached order listing, scoped by user since non-admin users see only their own orders
+    """
+    filters = hashlib.sha1(filter_query.model_dump_json().encode()).hexdigest()
+    return f"orders:list:{user.user_id}:{filters}"
+
+
+def listing_tags(user_id: UUID, status: OrderStatus, is_admin: bool = False) -> list[str]:
+    """
+    Tags of order listings that may contain orders of user with given status,
+    listings of admins contain orders of all users and are tagged by status only
+    :param user_id: id of user who owns the orders
+    :param status: status of orders
+    :param is_admin: if True, returns tag of admin listings
+    :return: list of tags
+    """
+    status = OrderStatus(status).value
+    if is_admin:
+        return [f"orders:tag:status:{status}"]
+    return [f"orders:tag:user:{user_id}:{status}"]
+
+
+def affected_listing_tags(user_id: UUID, statuses: Iterable[OrderStatus]) -> list[str]:
+    """
+    Tags of listings of users and admins affected by change of orders of user with given statuses
+    """
+    tags = []
+    for status in set(statuses):
+        tags += listing_tags(user_id, status) + listing_tags(user_id, status, is_admin=True)
+    return tags
+
+
+async def invalidate_listings(user_id: UUID, statuses: Iterable[OrderStatus]) -> None:
+    """
+    Delete cached listings affected by change of orders of user with given statuses,
+    all affected tags are invalidated in one Redis call
+    :param user_id: id of user who owns the changed orders
+    :param statuses: statuses of the changed orders before and after change
+    :return: nothing
+    """
+    tags = affected_listing_tags(user_id, statuses)
+    if tags:
+        await invalidate_tags_script(keys=tags)
+
+
+async def invalidate_orders(order_uuids: Iterable[UUID], tags: Iterable[str] = ()) -> None:
+    """
+    Delete cached orders changed outside of order_cache decorator from both tiers and listings under tags,
+    orders are deleted and other workers are notified with one pipeline
+    :param order_uuids: uuids of changed orders
+    :param tags: tags of affected listings, see affected_listing_tags
+    :return: nothing
+    """
+    keys = [str(order_uuid) for order_uuid in order_uuids]
+    if keys:
+        async with store.pipeline(transaction=False) as pipe:
+            pipe.delete(*keys)
+            for key in keys:
+                local_store.delete(key)
+                if settings.ORDER_CACHE_L1_ENABLED:
+                    pipe.publish(INVALIDATION_CHANNEL, f"{worker_id}:{key}")
+            await pipe.execute()
+    tags = list(set(tags))
+    if tags:
+        await invalidate_tags_script(keys=tags)
+
+
+async def acquire_lock(key: str) -> str | None:
+    """
+    Acquire short lock to load value of key, so that only one worker loads it from database
+    :param key: cache key
+    :return: lock token or None if lock is held by another worker
+    """
+    token = uuid4().hex
+    acquired = await store.set(f"lock:{key}", token, nx=True, px=settings.ORDER_CACHE_LOCK_TTL)
+    return token if acquired else None
+
+
+async def release_lock(key: str, token: str) -> None:
+    await release_lock_script(keys=[f"lock:{key}"], args=[token])
+
+
+async def wait_for(key: str, codec: ICodec) -> Any:
+    """
+    Wait until value of key is loaded by another worker, not longer than the lock lives,
+    waiting stops as soon as the lock is released without value, e.g. when the holder failed to load it
+    :param key: cache key
+    :param codec: codec of cached value
+    :return: cached value or None if it didn't appear
+    """
+    metrics.inc("order_cache_lock_waits")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.ORDER_CACHE_LOCK_TTL / 1000
+    while loop.time() < deadline:
+        await asyncio.sleep(settings.ORDER_CACHE_LOCK_POLL_INTERVAL / 1000)
+        async with store.pipeline(transaction=False) as pipe:
+            data, locked = await pipe.get(key).exists(f"lock:{key}").execute()
+        if data:
+            return codec.decode(data)
+        if not locked:
+            metrics.inc("order_cache_lock_abandoned")
+            return None
+    return None
+
+
+def check_permission(kwargs: dict, result: Any) -> None:
+    """
+    Repeat permission check of the repository for order served from cache
+    """
+    user = kwargs.get("user")
+    if "order_uuid" in kwargs and user is not None and not user.is_admin and result.user_id != user.user_id:
+        order_logger.info(f"NoPermissionException {user} object_id {kwargs['order_uuid']}")
+        raise NoPermissionException(kwargs["order_uuid"])
+
+
+async def start_refresh(key: str, interval: int) -> bool:
+    """
+    Check whether background refresh of key may start, refreshes are rate-limited
+    by the number of running refreshes in the worker and by interval per key across workers
+    :param key: cache key
+    :param interval: minimal interval between refreshes of key in seconds
+    :return: True if refresh may start
+    """
+    if len(refreshes) >= settings.ORDER_CACHE_MAX_REFRESHES:
+        return False
+    return bool(await store.set(f"refresh:{key}", worker_id, nx=True, ex=interval))
+
+
+def order_cache(
+        expiration: int = None,
+        update: bool = False,
+        delete: bool = False,
+        local: bool = False,
+        schema: Any = None,
+        soft_ttl: int = None,
+):
     """
     Decorator that handles caching of orders
     Doesn't comply with SRP since its logic is simple (instead of using several decorators)
 
-    :param expiration: Expiration time in seconds
+    :param expiration: Expiration time in seconds, with soft_ttl - hard TTL after which value is not served
     :param update: if True, replaces existing cached order with new data
     :param delete: if True, deletes cached order
+    :param local: if True, keeps recently read orders in memory of the worker in front of Redis
+    :param schema: type of cached result (schema or list of schemas), not required for delete
+    :param soft_ttl: time in seconds after which cached value is stale: it is still served
+        until expiration, but is refreshed in background (stale-while-revalidate), refresh runs the function
+        with service of "service" parameter working in its own session of refresh_sessions
     """
+    codec = schema_codec(schema) if schema is not None else None
+    use_local = local and settings.ORDER_CACHE_L1_ENABLED
+    local_ttl = min(expiration, settings.ORDER_CACHE_L1_TTL) if expiration else settings.ORDER_CACHE_L1_TTL
+
     def wrapped(func):
+        if soft_ttl and "service" not in inspect.signature(func).parameters:
+            raise TypeError(f"{func.__name__}: soft_ttl requires service parameter for refresh")
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
+            tags = []
             if "order_uuid" in kwargs:
                 key = str(kwargs["order_uuid"])
             elif "filter_query" in kwargs:
-                key = "-".join(str(k) for k in kwargs["filter_query"])
+                user = kwargs["user"]
+                key = listing_key(user, kwargs["filter_query"])
+                tags = listing_tags(user.user_id, kwargs["filter_query"].status, is_admin=user.is_admin)
             else:
                 key = "-".join(str(kwargs[k]) for k in kwargs)
 
-            try:
-                data = await store.get(key)
-            except ConnectionError:
-                raise
-
-            logger.info(f"Cache hit for key {key}: {"Yes" if data else "No"}")
-
             if delete:
                 result = await func(*args, **kwargs)
                 await store.delete(key)
-            elif data is None or update:
+                await invalidate(key)
+                return result
+
+            if update:
                 result = await func(*args, **kwargs)
-                data = pickle.dumps(result)
-                await store.setex(key, expiration, data) if expiration else await store.set(key, data)
-            else:
-                result = pickle.loads(data)
+                await save(key, tags, result)
+                await invalidate(key)
+                return result
+
+            result = local_store.get(key) if use_local else None
+            if use_local:
+                metrics.inc("order_cache_l1_hits" if result is not None else "order_cache_l1_misses")
+            if result is None:
+                try:
+                    data, stale = await read(key)
+                except ConnectionError:
+                    raise
+                result = codec.decode(data) if data else None
+                metrics.inc("order_cache_l2_hits" if result is not None else "order_cache_l2_misses")
+                if result is not None and use_local:
+                    local_store.set(key, result, ttl=local_ttl, size=len(data))
+                if result is not None and stale:
+                    metrics.inc("order_cache_stale_hits")
+                    await refresh(key, tags, args, kwargs)
+
+            logger.info(f"Cache hit for key {key}: {'Yes' if result is not None else 'No'}")
+            if result is None:
+                joined = key in flights
+                if joined:
+                    metrics.inc("order_cache_coalesced")
+                try:
+                    # the call runs with arguments of the first caller, including its request session,
+                    # joined callers get the same value (listing keys are per user, order permission
+                    # is checked below for each caller)
+                    result = await flights.do(key, partial(load, key, tags, args, kwargs))
+                except Exception:
+                    # error of another caller (permission, closed session of its request) says nothing
+                    # about this one, load with own arguments
+                    if not joined:
+                        raise
+                    result = await func(*args, **kwargs)
+            check_permission(kwargs, result)
+            return result
+
+        async def read(key: str) -> tuple[bytes | None, bool]:
+            """
+            Read cached value
+            :return: cached data and True if data is older than soft TTL
+            """
+            if not soft_ttl:
+                return await store.get(key), False
+            async with store.pipeline(transaction=False) as pipe:
+                data, ttl = await pipe.get(key).pttl(key).execute()
+            # age of value is derived from its remaining time to live
+            return data, 0 <= ttl < (expiration - soft_ttl) * 1000
+
+        async def refresh(key: str, tags: list[str], args: tuple, kwargs: dict) -> None:
+            """
+            Start background refresh of stale value unless refresh rate limit is reached
+            """
+            if not await start_refresh(key, interval=soft_ttl):
+                return
+            task = asyncio.create_task(run_refresh(key, tags, args, kwargs))
+            refreshes.add(task)
+            task.add_done_callback(refreshes.discard)
+
+        async def run_refresh(key: str, tags: list[str], args: tuple, kwargs: dict) -> None:
+            metrics.inc("order_cache_refreshes")
+            try:
+                if refresh_sessions is None:
+                    raise RuntimeError("sessionmaker of refreshes is not bound")
+                async with refresh_sessions() as session:
+                    result = await func(*args, **{**kwargs, "service": kwargs["service"].with_session(session)})
+                await save(key, tags, result)
+            except Exception as exc:
+                metrics.inc("order_cache_refresh_failures")
+                logger.error(f"Background refresh of key {key} failed: {exc!r}")
+
+        async def load(key: str, tags: list[str], args: tuple, kwargs: dict) -> Any:
+            """
+            Load value on cache miss and save it, only the holder of the lock loads value from database
+            """
+            token = None
+            if settings.ORDER_CACHE_LOCK_ENABLED:
+                token = await acquire_lock(key)
+                if token is None:
+                    result = await wait_for(key, codec)
+                    if result is not None:
+                        return result
+            try:
+                result = await func(*args, **kwargs)
+                await save(key, tags, result)
+            finally:
+                if token is not None:
+                    await release_lock(key, token)
             return result
 
+        async def save(key: str, tags: list[str], result: Any) -> None:
+            data = codec.encode(result)
+            if tags:
+                async with store.pipeline(transaction=False) as pipe:
+                    pipe.setex(key, expiration, data)
+                    for tag in tags:
+                        # tag lives as long as the most recent listing saved under it
+                        pipe.sadd(tag, key)
+                        pipe.expire(tag, expiration)
+                    await pipe.execute()
+            else:
+                await store.setex(key, expiration, data) if expiration else await store.set(key, data)
+            if use_local and not update:
+                local_store.set(key, result, ttl=local_ttl, size=len(data))
+
         return wrapper
 
     return wrapped
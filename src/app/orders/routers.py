@@ -9,10 +9,15 @@ from fastapi import (
 from starlette import status
 from starlette.responses import Response
 
+from app.common import settings
 from app.orders.cache import order_cache
 from app.orders.schemas import (
     NewOrderWithProductsSchema,
+    NewOrdersBulkSchema,
     OrderSchema,
+    OrderPageSchema,
+    OrdersStatusResultSchema,
+    OrdersStatusSchema,
     UpdateOrderWithProductsSchema,
     OrderFilterSchema,
     UserData,
@@ -32,8 +37,26 @@ async def create_order(
     return await service.create_order(user, request_data)
 
 
+@order_router.post("/bulk", response_model=list[OrderSchema])
+async def create_orders_bulk(
+        user: Annotated[UserData, Depends(get_current_active_user)],
+        request_data: NewOrdersBulkSchema,
+        service: IOrderService = Depends(),
+):
+    return await service.create_orders_bulk(user, request_data)
+
+
+@order_router.patch("/status", response_model=OrdersStatusResultSchema)
+async def update_orders_status(
+        user: Annotated[UserData, Depends(get_current_active_user)],
+        request_data: OrdersStatusSchema,
+        service: IOrderService = Depends(),
+):
+    return await service.update_orders_status(user, request_data)
+
+
 @order_router.put("/{order_uuid}", response_model=OrderSchema)
-@order_cache(update=True)
+@order_cache(update=True, schema=OrderSchema)
 async def update_order(
         user: Annotated[UserData, Depends(get_current_active_user)],
         order_uuid: UUID,
@@ -43,8 +66,22 @@ async def update_order(
     return await service.update_order(user, order_uuid, request_data)
 
 
+@order_router.get("/page", response_model=OrderPageSchema)
+@order_cache(
+    expiration=settings.ORDER_LIST_CACHE_TTL,
+    soft_ttl=settings.ORDER_LIST_CACHE_SOFT_TTL,
+    schema=OrderPageSchema,
+)
+async def get_orders_page(
+        user: Annotated[UserData, Depends(get_current_active_user)],
+        filter_query: Annotated[OrderFilterSchema, Query()],
+        service: IOrderService = Depends(),
+):
+    return await service.filter_orders(user, filters=filter_query)
+
+
 @order_router.get("/{order_uuid}", response_model=OrderSchema)
-@order_cache()
+@order_cache(local=True, schema=OrderSchema)
 async def get_order(
         user: Annotated[UserData, Depends(get_current_active_user)],
         order_uuid: UUID,
@@ -54,13 +91,14 @@ async def get_order(
 
 
 @order_router.get("", response_model=list[OrderSchema])
-@order_cache(expiration=30)
 async def get_orders(
         user: Annotated[UserData, Depends(get_current_active_user)],
         filter_query: Annotated[OrderFilterSchema, Query()],
         service: IOrderService = Depends(),
 ):
-    return await service.filter_orders(user, filters=filter_query)
+    # list of orders without cursor, kept for existing clients, shares cached pages with /page
+    page = await get_orders_page(user=user, filter_query=filter_query, service=service)
+    return page.items
 
 
 @order_router.delete("/{order_uuid}")
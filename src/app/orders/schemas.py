@@ -1,10 +1,15 @@
+import base64
+import binascii
+from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
-from pydantic import computed_field, Field
+from pydantic import Field, model_validator, ValidationError
 
+from app.common import settings
 from app.common.enums import OrderStatus
+from app.common.exceptions import InvalidCursorException
 from app.common.schemas import BaseSchema
 from app.products.schemas import (
     NewProductSchema,
@@ -17,35 +22,63 @@ class NewOrderWithProductsSchema(BaseSchema):
     products: Optional[list[NewProductSchema]]
 
 
+class NewOrdersBulkSchema(BaseSchema):
+    orders: list[NewOrderWithProductsSchema] = Field(..., min_length=1, max_length=settings.ORDERS_BULK_MAX_SIZE)
+
+
 class UpdateOrderWithProductsSchema(BaseSchema):
     status: OrderStatus
     customer_name: str
     products: list[NewProductSchema]
 
 
+class OrdersStatusSchema(BaseSchema):
+    uuids: list[UUID] = Field(..., min_length=1, max_length=settings.ORDERS_BULK_MAX_SIZE)
+    status: OrderStatus
+
+
+class OrdersStatusResultSchema(BaseSchema):
+    updated: list[UUID]
+    not_updated: list[UUID] = Field(description="missing, deleted, not accessible or already in status")
+
+
+class OrderStatusChangeSchema(BaseSchema):
+    uuid: UUID
+    user_id: UUID
+    old_status: OrderStatus
+    new_status: OrderStatus
+
+
 class OrderSchema(BaseSchema):
     uuid: UUID
     status: OrderStatus
     customer_name: str
     user_id: UUID
     products: Optional[list[ProductSchema]]
+    total_price: Optional[Decimal] = None
+    item_count: Optional[int] = None
 
-    @computed_field
-    @property
-    def total_price(self) -> Decimal:
+    @model_validator(mode="after")
+    def calculate_totals(self) -> "OrderSchema":
         """
-        Calculate total price of the order based on data in products list
-        :return: total price of the order
+        Calculate totals of the order based on data in products list,
+        if they are not provided (orders loaded from database have them stored)
+        :return: schema with totals
         """
-        total = 0
-        if self.products:
-            total = sum(product.quantity * product.price for product in self.products)
-        return Decimal(total)
+        products = self.products or []
+        if self.total_price is None:
+            self.total_price = Decimal(sum(product.quantity * product.price for product in products))
+        if self.item_count is None:
+            self.item_count = sum(product.quantity for product in products)
+        return self
 
 
 class OrderFilterSchema(BaseSchema):
     limit: int = Field(20, gt=0, le=100)
     offset: int = Field(0, ge=0)
+    cursor: Optional[str] = Field(
+        None, description="next_cursor of the previous page from GET /orders/page, offset is ignored"
+    )
     status: OrderStatus
     min_price: Optional[Decimal] = None
     max_price: Optional[Decimal] = None
@@ -53,6 +86,38 @@ class OrderFilterSchema(BaseSchema):
     max_total: Optional[Decimal] = None
 
 
+class OrderPageSchema(BaseSchema):
+    items: list[OrderSchema]
+    next_cursor: Optional[str] = None
+
+
+class OrderCursorSchema(BaseSchema):
+    """
+    Position of the last order of the page in ordering of orders by (created_at, uuid)
+    """
+    created_at: datetime
+    uuid: UUID
+
+    def encode(self) -> str:
+        """
+        Encode position to opaque string
+        :return: cursor
+        """
+        return base64.urlsafe_b64encode(self.model_dump_json().encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, cursor: str) -> "OrderCursorSchema":
+        """
+        Decode cursor produced by encode
+        :param cursor: cursor
+        :return: position of the last order of the previous page
+        """
+        try:
+            return cls.model_validate_json(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except (binascii.Error, ValueError, ValidationError):
+            raise InvalidCursorException(cursor)
+
+
 class UserData(BaseSchema):
     user_id: UUID
     is_admin: bool
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Any
 from uuid import UUID
 
 from fastapi import Depends
@@ -7,11 +8,19 @@ from app.common import (
     logger,
     order_logger,
 )
+from app.common.enums import OrderStatus
 from app.infrastructure.db.models import OrderModel
+from app.infrastructure.db.routing import pin_to_primary
+from app.interfaces.cache import IOrderCache
 from app.interfaces.repositories import IOrderRepository
 from app.orders.schemas import (
     NewOrderWithProductsSchema,
+    NewOrdersBulkSchema,
+    OrderCursorSchema,
     OrderSchema,
+    OrderPageSchema,
+    OrdersStatusResultSchema,
+    OrdersStatusSchema,
     UpdateOrderWithProductsSchema,
     OrderFilterSchema,
     UserData,
@@ -23,9 +32,20 @@ class IOrderService(ABC):
     Business logic for order management (CRUD)
     """
     repo: IOrderRepository
+    cache: IOrderCache
 
-    def __init__(self, repo: IOrderRepository = Depends()):
+    def __init__(self, repo: IOrderRepository = Depends(), cache: IOrderCache = Depends()):
         self.repo = repo
+        self.cache = cache
+
+    def with_session(self, session: Any) -> "IOrderService":
+        """
+        Service of the same kind working in given session instead of the session of request,
+        e.g. for background refresh of cached orders
+        :param session: database session
+        :return: service
+        """
+        return type(self)(repo=self.repo.with_session(session), cache=self.cache)
 
     @abstractmethod
     async def create_order(self, user: UserData, data: NewOrderWithProductsSchema) \
@@ -38,6 +58,16 @@ class IOrderService(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def create_orders_bulk(self, user: UserData, data: NewOrdersBulkSchema) -> list[OrderSchema]:
+        """
+        Create new orders from request data with authentication data, all orders are created or none
+        :param user: user data from authentication service
+        :param data: orders data from request
+        :return: created orders (dto) in order of request data
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def update_order(self, user: UserData, order_uuid: UUID, data: UpdateOrderWithProductsSchema) \
             -> OrderSchema:
@@ -51,6 +81,16 @@ class IOrderService(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def update_orders_status(self, user: UserData, data: OrdersStatusSchema) -> OrdersStatusResultSchema:
+        """
+        Change status of many orders at once, admin can update any order, user - only their own
+        :param user: user data from authentication service
+        :param data: uuids of orders and new status from request
+        :return: uuids of updated orders and of orders that were not updated
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def get_order(self, user: UserData, order_uuid: UUID) -> OrderSchema:
         """
@@ -64,14 +104,14 @@ class IOrderService(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def filter_orders(self, user: UserData, filters: OrderFilterSchema) -> list[OrderSchema]:
+    async def filter_orders(self, user: UserData, filters: OrderFilterSchema) -> OrderPageSchema:
         """
-        Retrieve list of orders based on filters
+        Retrieve page of orders based on filters
         (which were not deleted, i.e. is_deleted is False)
         :param user: user data from authentication service,
         admin can see all orders, user - only their own
-        :param filters: values for filters
-        :return: list of orders corresponding to filters
+        :param filters: values for filters and pagination
+        :return: list of orders corresponding to filters and cursor of the next page
         """
         raise NotImplementedError
 
@@ -102,28 +142,57 @@ class OrderService(IOrderService):
             user_id=obj.user_id,
             status=obj.status,
             products=obj.products if "products" in obj.__dict__ else [],
+            # totals stored with the order, calculated from products if not loaded
+            total_price=obj.__dict__.get("total_price"),
+            item_count=obj.__dict__.get("item_count"),
         )
 
     async def create_order(self, user: UserData, data: NewOrderWithProductsSchema) -> OrderSchema:
         logger.info("OrderService: create_order")
         order_logger.info(f"create_order: {user}, data: {data}")
         new_object = await self.repo.create_order_with_products(user, data)
+        await self.cache.invalidate_listings(new_object.user_id, [new_object.status])
+        await pin_to_primary(user.user_id)
         return await OrderService.get_response_schema(new_object)
 
+    async def create_orders_bulk(self, user: UserData, data: NewOrdersBulkSchema) -> list[OrderSchema]:
+        logger.info("OrderService: create_orders_bulk")
+        order_logger.info(f"create_orders_bulk: {user}, orders: {len(data.orders)}")
+        new_objects = await self.repo.create_orders_bulk(user, data.orders)
+        await self.cache.invalidate_listings(user.user_id, [OrderStatus.PENDING])
+        await pin_to_primary(user.user_id)
+        return [await OrderService.get_response_schema(obj) for obj in new_objects]
+
     async def update_order(self, user: UserData, order_uuid: UUID, data: UpdateOrderWithProductsSchema) \
             -> OrderSchema:
         logger.info("OrderService: update_order")
         order_logger.info(f"update_order: {user}, order_uuid {order_uuid} data: {data}")
-        upd_object = await self.repo.update_order_with_products(object_id=order_uuid, data=data, user=user)
+        upd_object, old_status = await self.repo.update_order_with_products(
+            object_id=order_uuid, data=data, user=user
+        )
+        await self.cache.invalidate_listings(upd_object.user_id, [old_status, upd_object.status])
+        await pin_to_primary(user.user_id, upd_object.user_id)
         return await OrderService.get_response_schema(upd_object)
 
+    async def update_orders_status(self, user: UserData, data: OrdersStatusSchema) -> OrdersStatusResultSchema:
+        logger.info("OrderService: update_orders_status")
+        order_logger.info(f"update_orders_status: {user}, status: {data.status}, orders: {data.uuids}")
+        changes = await self.repo.update_orders_status(object_ids=data.uuids, status=data.status, user=user)
+        await self.cache.invalidate_status_changes(changes)
+        await pin_to_primary(user.user_id, *{change.user_id for change in changes})
+        updated = {change.uuid for change in changes}
+        return OrdersStatusResultSchema(
+            updated=[order_uuid for order_uuid in data.uuids if order_uuid in updated],
+            not_updated=[order_uuid for order_uuid in data.uuids if order_uuid not in updated],
+        )
+
     async def get_order(self, user: UserData, order_uuid: UUID) -> OrderSchema:
         logger.info("OrderService: get_order")
         order_logger.info(f"get_order: {user}, order_uuid: {order_uuid}")
         obj = await self.repo.get_order(order_uuid, user)
         return await OrderService.get_response_schema(obj)
 
-    async def filter_orders(self, user: UserData, filters: OrderFilterSchema) -> list[OrderSchema]:
+    async def filter_orders(self, user: UserData, filters: OrderFilterSchema) -> OrderPageSchema:
         logger.info("OrderService: filter_orders")
         order_logger.info(f"filter_orders: {user}, filters: {filters}")
         objects = await self.repo.filter_orders(
@@ -131,14 +200,20 @@ class OrderService(IOrderService):
             status=filters.status,
             min_price=filters.min_price, max_price=filters.max_price,
             min_total=filters.min_total, max_total=filters.max_total,
+            cursor=OrderCursorSchema.decode(filters.cursor) if filters.cursor else None,
             user=user
         )
         result = []
         for obj in objects:
             result.append(await self.get_response_schema(obj))
-        return result
+        next_cursor = None
+        if len(objects) == filters.limit:
+            next_cursor = OrderCursorSchema(created_at=objects[-1].created_at, uuid=objects[-1].uuid).encode()
+        return OrderPageSchema(items=result, next_cursor=next_cursor)
 
     async def delete_order(self, user: UserData, order_uuid: UUID):
         logger.info("OrderService: delete_order")
         order_logger.info(f"delete_order: {user}, order_uuid: {order_uuid}")
-        await self.repo.soft_delete(object_id=order_uuid, user=user)
+        obj = await self.repo.soft_delete(object_id=order_uuid, user=user)
+        await self.cache.invalidate_listings(obj.user_id, [obj.status])
+        await pin_to_primary(user.user_id, obj.user_id)
@@ -0,0 +1,70 @@
+"""
+One-off maintenance command that sets expiration of tokens stored in Redis without it
+
+    python -m app.users.expire_tokens [--batch-size 1000] [--dry-run]
+
+Keys are scanned in batches with SCAN, so Redis is not blocked, TTL of a batch is read and
+expiration is set with one pipeline per batch. Token expires at its exp claim or after TOKEN_DEFAULT_TTL,
+keys which are not JWT are left untouched
+"""
+import argparse
+import asyncio
+import time
+
+from app.common import logger, settings
+from app.common.redis import r
+from app.users.tokens import unverified_claims
+
+# JWT is header.claims.signature
+TOKEN_PATTERN = "*.*.*"
+
+
+async def expire_tokens(batch_size: int = 1000, dry_run: bool = False) -> dict[str, int]:
+    """
+    Set expiration of tokens without it
+    :param batch_size: number of keys scanned and updated per round trip
+    :param dry_run: only count keys that would be updated
+    :return: number of scanned and expired keys
+    """
+    stats = {"scanned": 0, "expired": 0, "skipped": 0}
+    cursor = 0
+    while True:
+        cursor, keys = await r.scan(cursor, match=TOKEN_PATTERN, count=batch_size)
+        stats["scanned"] += len(keys)
+        if keys:
+            async with r.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.ttl(key)
+                ttls = await pipe.execute()
+            async with r.pipeline(transaction=False) as pipe:
+                for key, ttl in zip(keys, ttls):
+                    # -1: key without expiration, -2: key is already gone
+                    if ttl != -1:
+                        continue
+                    claims = unverified_claims(key.decode())
+                    if claims is None:
+                        stats["skipped"] += 1
+                        continue
+                    exp = claims.get("exp")
+                    if not isinstance(exp, (int, float)):
+                        exp = time.time() + settings.TOKEN_DEFAULT_TTL
+                    # expiration in the past deletes the key
+                    pipe.expireat(key, int(exp))
+                    stats["expired"] += 1
+                if not dry_run:
+                    await pipe.execute()
+        logger.info(f"expire_tokens: {stats}")
+        if cursor == 0:
+            return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Set expiration of tokens stored in Redis without it")
+    parser.add_argument("--batch-size", type=int, default=1000, help="number of keys per SCAN and pipeline")
+    parser.add_argument("--dry-run", action="store_true", help="only count keys that would be updated")
+    args = parser.parse_args()
+    asyncio.run(expire_tokens(batch_size=args.batch_size, dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
+from typing import Annotated
+
 from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette import status
+from starlette.responses import Response
+
+from app.common.settings import oauth2_scheme
 
 from app.users.schemas import (
     LoginSchema,
@@ -17,3 +23,12 @@ async def get_access_token(
 ):
     login = LoginSchema(username=request_data.username, password=request_data.password)
     return await service.login_user(data=login)
+
+
+@auth_router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+        token: Annotated[str, Depends(oauth2_scheme)],
+        service: IAuthService = Depends(),
+):
+    await service.logout_user(token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
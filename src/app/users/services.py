@@ -1,15 +1,19 @@
+import time
+from datetime import timedelta
 from abc import ABC, abstractmethod
-from typing import Annotated
+from typing import Annotated, Any
 from uuid import UUID
 
 from fastapi import Depends
-from httpx import AsyncClient, Response, ConnectError
+from httpx import AsyncClient, Response, TransportError
 
 from app.common import logger, settings
 from app.common.enums import UserRoleEnum
 from app.common.exceptions import (
     AuthenticationException,
     AuthServiceNotAvailable,
+    CircuitOpenException,
+    InvalidTokenException,
 )
 from app.common.settings import oauth2_scheme
 from app.infrastructure.adapters.http_client import http_session
@@ -20,13 +24,31 @@ from app.users.schemas import (
     TokenSchema,
     TokenPayload,
 )
+from app.users.tokens import auth_breaker, verifier, payload_from_claims, token_expiration
+
+
+def number_or_none(value: Any) -> float | None:
+    """
+    Expiration value given by auth service if it is a number, otherwise exp claim of token is used
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        if value is not None:
+            logger.error(f"AuthService: expiration is not a number: {value!r}")
+        return None
+    return value
 
 
 async def get_current_user(
         token: Annotated[str, Depends(oauth2_scheme)],
-        repo: IUserRepository = Depends()
+        repo: IUserRepository = Depends(),
+        service: "IAuthService" = Depends(),
 ) -> TokenPayload:
-    return await repo.get(token)
+    payload = await repo.get(token)
+    if payload is None and settings.AUTH_LOCAL_VERIFICATION:
+        payload = await service.get_token_payload(token)
+    if payload is None:
+        raise InvalidTokenException()
+    return payload
 
 
 async def get_current_active_user(
@@ -71,11 +93,40 @@ class IAuthService(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def validate_token(self, data: TokenSchema) -> TokenPayload:
+    async def logout_user(self, token: str) -> None:
+        """
+        Revoke token of user, logout takes effect on all workers
+        :param token: encoded token provided by auth service
+        :return: nothing
         """
-        Get user data from auth service
+        raise NotImplementedError
+
+    @abstractmethod
+    async def validate_token(self, data: TokenSchema) -> TokenPayload | None:
+        """
+        Get user data from auth service and save it to cache
         :param data: encoded token provided by auth service
-        :return: user data from auth service
+        :return: user data from auth service or None if token is not valid
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def verify_token(self, token: str) -> TokenPayload | None:
+        """
+        Verify token locally, without request to auth service, and save user data to cache,
+        raises InvalidTokenException if signature or claims of token are not valid
+        :param token: encoded token provided by auth service
+        :return: user data from claims of token or None if token can't be verified locally
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_token_payload(self, token: str) -> TokenPayload | None:
+        """
+        Get user data of token which is not in cache, verify it locally and fall back to auth service
+        if token can't be verified locally, revoked tokens are rejected before any verification
+        :param token: encoded token provided by auth service
+        :return: user data or None if token is not valid
         """
         raise NotImplementedError
 
@@ -84,19 +135,60 @@ class AuthService(IAuthService):
 
     async def request_data(self, url, payload) -> Response:
         try:
-            return await self.http_client.post(url, json=payload.dict())
-        except ConnectError:
+            return await auth_breaker.call(
+                lambda: self.http_client.post(url, json=payload.dict()),
+                is_failure=lambda response: response.status_code >= 500,
+            )
+        except (TransportError, CircuitOpenException) as exc:
+            logger.error(f"AuthService: request failed: {exc!r}")
             raise AuthServiceNotAvailable
 
-    async def validate_token(self, data: TokenSchema) -> None:
+    async def validate_token(self, data: TokenSchema) -> TokenPayload | None:
         logger.info("AuthService: validate_token and save to cache")
         response = await self.request_data(url=f'{self.url}/validate', payload=data)
         logger.info(f"validate_token: {response.json()}")
         if response.status_code != 200:
             logger.error(f'AuthService: validate_token failed: {response}')
-        else:
-            logger.info(f'AuthService: {response.json()}')
-            await self.repo.create(TokenPayload(**response.json()), key=data.access_token)
+            return None
+        logger.info(f'AuthService: {response.json()}')
+        result = response.json()
+        payload = TokenPayload(**result)
+        exp = number_or_none(result.get("exp"))
+        expires_in = number_or_none(result.get("expires_in"))
+        if exp is None and expires_in is not None:
+            exp = time.time() + expires_in
+        await self.save_token(data.access_token, payload, exp)
+        return payload
+
+    async def verify_token(self, token: str) -> TokenPayload | None:
+        claims = await verifier.verify(token, self.http_client)
+        payload = payload_from_claims(claims) if claims is not None else None
+        if payload is None:
+            return None
+        logger.info("AuthService: token verified locally, save to cache")
+        await self.save_token(token, payload, claims["exp"])
+        return payload
+
+    async def save_token(self, token: str, payload: TokenPayload, exp: float | None = None) -> None:
+        """
+        Save user data of token to cache until token expires
+        :param token: encoded token provided by auth service
+        :param payload: user data
+        :param exp: expiration timestamp, exp claim of token is used without it
+        :return: nothing
+        """
+        expiration = token_expiration(token, exp)
+        if expiration.total_seconds() < 1:
+            return
+        await self.repo.create(payload, key=token, exp=expiration)
+
+    async def get_token_payload(self, token: str) -> TokenPayload | None:
+        if await self.repo.is_revoked(token):
+            return None
+        payload = await self.verify_token(token)
+        if payload is None:
+            payload = await self.validate_token(TokenSchema(access_token=token, token_type="bearer"))
+        return payload
 
     async def login_user(self, data: LoginSchema) -> TokenSchema:
         logger.info("AuthService: login_user")
@@ -105,5 +197,18 @@ class AuthService(IAuthService):
             raise AuthenticationException(username=data.username)
 
         result = TokenSchema(**response.json())
-        await self.validate_token(result)
+        payload = None
+        if settings.AUTH_LOCAL_VERIFICATION:
+            try:
+                payload = await self.verify_token(result.access_token)
+            except InvalidTokenException:
+                # token is issued by auth service itself, local keys or settings are out of date
+                logger.error("AuthService: token issued by auth service is not valid locally")
+        if payload is None:
+            await self.validate_token(result)
         return result
+
+    async def logout_user(self, token: str) -> None:
+        logger.info("AuthService: logout_user")
+        # token is accepted locally until exp + leeway
+        await self.repo.revoke(token, exp=token_expiration(token) + timedelta(seconds=settings.JWT_LEEWAY))
@@ -0,0 +1,226 @@
+import time
+from datetime import timedelta
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from httpx import AsyncClient, HTTPError, TransportError
+from pydantic import ValidationError
+
+from app.common import logger, settings
+from app.common.circuit_breaker import CircuitBreaker
+from app.common.exceptions import CircuitOpenException, InvalidTokenException
+from app.common.metrics import metrics
+from app.users.schemas import TokenPayload
+
+HMAC_ALGORITHMS = {"HS256", "HS384", "HS512"}
+RSA_ALGORITHMS = {"RS256", "RS384", "RS512"}
+
+# Calls to auth service: requests of AuthService and JWKS of TokenVerifier
+auth_breaker = CircuitBreaker(
+    "auth",
+    failure_exceptions=(TransportError,),
+    window=settings.AUTH_BREAKER_WINDOW,
+    min_calls=settings.AUTH_BREAKER_MIN_CALLS,
+    failure_rate=settings.AUTH_BREAKER_FAILURE_RATE,
+    slow_call_duration=settings.AUTH_BREAKER_SLOW_CALL_DURATION,
+    slow_call_rate=settings.AUTH_BREAKER_SLOW_CALL_RATE,
+    open_duration=settings.AUTH_BREAKER_OPEN_DURATION,
+    half_open_calls=settings.AUTH_BREAKER_HALF_OPEN_CALLS,
+)
+
+
+class TokenVerifier:
+    """
+    Verifies JWT issued by auth service without calling it: HS* tokens with shared secret,
+    RS* tokens with public keys of JWKS of auth service, keys are cached and refreshed
+    when they expire or token is signed with unknown key
+    """
+
+    def __init__(
+            self,
+            secret: str,
+            algorithms: list[str],
+            jwks_url: str = "",
+            jwks_ttl: int = 3600,
+            leeway: int = 30,
+            issuer: str = "",
+            audience: str = "",
+            breaker: CircuitBreaker | None = None,
+    ):
+        self.secret = secret
+        self.algorithms = set(algorithms)
+        self.jwks_url = jwks_url
+        self.jwks_ttl = jwks_ttl
+        self.leeway = leeway
+        self.issuer = issuer
+        self.audience = audience
+        self.breaker = breaker
+        self._keys: dict[str | None, RSAPublicKey] = {}
+        self._keys_fetched_at = 0.0
+
+    async def verify(self, token: str, http_client: AsyncClient) -> dict[str, Any] | None:
+        """
+        Verify signature and registered claims of token, raises InvalidTokenException if signature
+        or claims are not valid, such token must not be accepted by auth service either
+        :param token: encoded token
+        :param http_client: client used to fetch JWKS
+        :return: claims of token or None if token can't be verified locally
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.DecodeError:
+            return None
+        algorithm = header.get("alg")
+        if algorithm not in self.algorithms:
+            return None
+        if algorithm in HMAC_ALGORITHMS:
+            key = self.secret or None
+        elif algorithm in RSA_ALGORITHMS:
+            kid = header.get("kid")
+            key = await self.get_key(kid, http_client) if kid is None or isinstance(kid, str) else None
+        else:
+            key = None
+        if key is None:
+            return None
+        try:
+            # tokens without expiration are not accepted locally
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                leeway=self.leeway,
+                issuer=self.issuer or None,
+                audience=self.audience or None,
+                options={"require": ["exp"], "verify_aud": bool(self.audience)},
+            )
+        except jwt.InvalidSignatureError:
+            metrics.inc("token_local_invalid_signatures")
+            raise InvalidTokenException()
+        except jwt.DecodeError:
+            # claims are not a JSON object or registered claims have values of unexpected type
+            return None
+        except jwt.InvalidTokenError:
+            metrics.inc("token_local_invalid_claims")
+            raise InvalidTokenException()
+
+    async def get_key(self, kid: str | None, http_client: AsyncClient) -> RSAPublicKey | None:
+        """
+        Public RSA key of auth service by key id
+        :param kid: key id from header of token
+        :param http_client: client used to fetch JWKS
+        :return: public key or None if key is unknown
+        """
+        if not self.jwks_url:
+            return None
+        expired = time.monotonic() - self._keys_fetched_at > self.jwks_ttl
+        # unknown key may be a new one after rotation, but JWKS is not fetched more often than once a minute
+        unknown = kid not in self._keys and time.monotonic() - self._keys_fetched_at > 60
+        if expired or unknown:
+            await self.fetch_keys(http_client)
+        if kid is None and len(self._keys) == 1:
+            return next(iter(self._keys.values()))
+        return self._keys.get(kid)
+
+    async def fetch_keys(self, http_client: AsyncClient) -> None:
+        """
+        Fetch JWKS through the circuit breaker of auth service, keys known before are kept
+        if JWKS is not available or is not a JSON object with list of keys, invalid keys are skipped
+        :param http_client: client used to fetch JWKS
+        :return: nothing
+        """
+        self._keys_fetched_at = time.monotonic()
+        try:
+            if self.breaker is not None:
+                response = await self.breaker.call(
+                    lambda: http_client.get(self.jwks_url),
+                    is_failure=lambda response: response.status_code >= 500,
+                )
+            else:
+                response = await http_client.get(self.jwks_url)
+            response.raise_for_status()
+            document = response.json()
+            if not isinstance(document, dict) or not isinstance(document.get("keys"), list):
+                raise ValueError("JWKS is not an object with list of keys")
+            self._keys = {
+                key.get("kid"): public_key
+                for key in document["keys"]
+                if (public_key := rsa_public_key(key)) is not None
+            }
+            metrics.inc("jwks_fetches")
+        except (HTTPError, CircuitOpenException, ValueError, KeyError, AttributeError, TypeError) as exc:
+            logger.error(f"TokenVerifier: JWKS is not available: {exc!r}")
+
+
+def rsa_public_key(key: Any) -> RSAPublicKey | None:
+    """
+    Public key of RSA JWK
+    :param key: JWK from JWKS
+    :return: public key or None if JWK is not a valid RSA key
+    """
+    if not isinstance(key, dict) or key.get("kty") != "RSA" or not isinstance(key.get("kid", ""), str):
+        return None
+    try:
+        public_key = jwt.PyJWK(key).key
+    except (jwt.PyJWTError, ValueError, KeyError, AttributeError, TypeError) as exc:
+        logger.error(f"TokenVerifier: invalid key in JWKS: {exc!r}")
+        return None
+    return public_key if isinstance(public_key, RSAPublicKey) else None
+
+
+def unverified_claims(token: str) -> dict[str, Any] | None:
+    """
+    Decode claims of token without verification, only to learn when it expires
+    :param token: encoded token
+    :return: claims or None if token is not JWT
+    """
+    try:
+        if "alg" not in jwt.get_unverified_header(token):
+            return None
+        return jwt.decode(token, options={"verify_signature": False})
+    except jwt.DecodeError:
+        return None
+
+
+def token_expiration(token: str, exp: float | None = None) -> timedelta:
+    """
+    Time left until token expires
+    :param token: encoded token
+    :param exp: expiration timestamp given by auth service, exp claim of token is used without it
+    :return: time left, TOKEN_DEFAULT_TTL if expiration is unknown, zero or negative if token is expired
+    """
+    if exp is None:
+        claims = unverified_claims(token) or {}
+        exp = claims.get("exp") if isinstance(claims.get("exp"), (int, float)) else None
+    if exp is None:
+        return timedelta(seconds=settings.TOKEN_DEFAULT_TTL)
+    return timedelta(seconds=exp - time.time())
+
+
+def payload_from_claims(claims: dict[str, Any]) -> TokenPayload | None:
+    """
+    Derive user data from claims of token
+    :param claims: verified claims
+    :return: user data or None if claims don't contain it
+    """
+    try:
+        return TokenPayload(
+            uuid=str(claims.get("uuid") or claims["sub"]),
+            username=claims.get("username") or claims.get("preferred_username") or claims["sub"],
+            role=claims["role"],
+            is_active=claims.get("is_active", True),
+        )
+    except (KeyError, ValidationError):
+        return None
+
+
+verifier = TokenVerifier(
+    secret=settings.SECRET_KEY,
+    algorithms=[algorithm.strip() for algorithm in settings.JWT_ALGORITHMS.split(",") if algorithm.strip()],
+    jwks_url=settings.AUTH_JWKS_URL,
+    jwks_ttl=settings.AUTH_JWKS_TTL,
+    leeway=settings.JWT_LEEWAY,
+    issuer=settings.JWT_ISSUER,
+    audience=settings.JWT_AUDIENCE,
+    breaker=auth_breaker,
+)
@@ -0,0 +1,148 @@
+"""
+Benchmark of OrderRepository.filter_orders on seeded database
+
+Seeds orders and products (1M products by default) in a transaction which is rolled back at the end,
+so it may be run against any database with applied migrations, and prints plans of the legacy statement
+(products joined to orders) and of the current one
+
+    python -m benchmarks.filter_orders [--orders 200000] [--products-per-order 5]
+"""
+import argparse
+import asyncio
+from decimal import Decimal
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.common import settings
+from app.common.enums import OrderStatus
+from app.infrastructure.db.config import metadata
+from app.infrastructure.db.models import OrderModel, ProductModel
+from app.infrastructure.db.sessions import async_engine
+from app.infrastructure.repositories.sqlalchemy.orders import OrderRepository
+from app.orders.schemas import UserData
+
+SEED_USERS = 100
+SEED_USER = UUID(int=1)
+
+SEED_ORDERS = """
+INSERT INTO orders (uuid, created_at, customer_name, status, is_deleted, user_id)
+SELECT
+    gen_random_uuid(),
+    now() - n * interval '1 second',
+    'customer ' || n,
+    (ARRAY['PENDING', 'CONFIRMED', 'CANCELLED'])[1 + n % 3]::orderstatus,
+    n % 20 = 0,
+    ('00000000-0000-0000-0000-' || lpad(to_hex(1 + n % :users), 12, '0'))::uuid
+FROM generate_series(1, :orders) AS n
+"""
+
+SEED_PRODUCTS = """
+INSERT INTO products (uuid, created_at, name, price, quantity, order_uuid)
+SELECT
+    gen_random_uuid(),
+    o.created_at,
+    'product ' || p,
+    round((random() * 1000 + 1)::numeric, 2),
+    1 + (random() * 9)::int,
+    o.uuid
+FROM orders o, generate_series(1, :products) AS p
+"""
+
+
+def legacy_filter_orders_stmt(
+        user: UserData,
+        limit: int,
+        status: OrderStatus,
+        min_price: Decimal,
+        max_price: Decimal,
+        min_total: Decimal,
+        max_total: Decimal,
+) -> sa.Select:
+    """
+    Statement of filter_orders before products were moved to subqueries, kept for comparison
+    """
+    stmt = sa.select(OrderModel).join(ProductModel).where(
+        OrderModel.status == status,
+        OrderModel.is_deleted == False  # noqa E712, E225
+    )
+    if not user.is_admin:
+        stmt = stmt.where(OrderModel.user_id == user.user_id)
+    stmt = stmt.where(
+        ProductModel.price >= min_price,
+        ProductModel.price <= max_price,
+    ).group_by(
+        OrderModel.uuid
+    ).having(
+        func.sum(ProductModel.price * ProductModel.quantity) >= min_total,
+        func.sum(ProductModel.price * ProductModel.quantity) <= max_total,
+    )
+    return stmt.order_by(OrderModel.created_at, OrderModel.uuid).limit(limit)
+
+
+async def seed(connection: AsyncConnection, orders: int, products_per_order: int) -> None:
+    """
+    Create tables if they don't exist and fill them with generated orders and products
+    :param connection: connection with open transaction
+    :param orders: number of orders
+    :param products_per_order: number of products of each order
+    :return: nothing
+    """
+    await connection.run_sync(metadata.create_all, checkfirst=True)
+    await connection.execute(sa.text(SEED_ORDERS), {"orders": orders, "users": SEED_USERS})
+    await connection.execute(sa.text(SEED_PRODUCTS), {"products": products_per_order})
+    await connection.execute(sa.text("ANALYZE orders"))
+    await connection.execute(sa.text("ANALYZE products"))
+
+
+async def explain(connection: AsyncConnection, stmt: sa.Select, analyze: bool = True) -> str:
+    """
+    Get plan of statement
+    :param connection: database connection
+    :param stmt: statement to explain
+    :param analyze: if True, statement is executed and actual timings are reported
+    :return: plan in text format
+    """
+    sql = stmt.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    options = "ANALYZE, BUFFERS" if analyze else "COSTS"
+    resp = await connection.execute(sa.text(f"EXPLAIN ({options}) {sql}"))
+    return "\n".join(resp.scalars().all())
+
+
+async def main(orders: int, products_per_order: int) -> None:
+    engine = async_engine(settings.db_url)
+    filters = dict(
+        limit=10,
+        status=OrderStatus.PENDING.value,
+        min_price=Decimal(100),
+        max_price=Decimal(500),
+        min_total=Decimal(1000),
+        max_total=Decimal(20000),
+    )
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            try:
+                await seed(connection, orders, products_per_order)
+                for is_admin in (False, True):
+                    user = UserData(user_id=SEED_USER, is_admin=is_admin)
+                    for name, stmt in (
+                            ("legacy", legacy_filter_orders_stmt(user, **filters)),
+                            ("current", OrderRepository.filter_orders_stmt(user, **filters)),
+                    ):
+                        print(f"--- {name}, admin: {is_admin}")
+                        print(await explain(connection, stmt))
+            finally:
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--products-per-order", type=int, default=5)
+    arguments = parser.parse_args()
+    asyncio.run(main(arguments.orders, arguments.products_per_order))
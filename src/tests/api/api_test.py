@@ -10,6 +10,7 @@ from app.common.enums import OrderStatus
 from app.interfaces.repositories import IOrderRepository
 from app.orders.schemas import (
     NewOrderWithProductsSchema,
+    NewOrdersBulkSchema,
     UpdateOrderWithProductsSchema,
 )
 
@@ -52,6 +53,52 @@ class TestOrdersAPI:
         )
         assert response.status_code == status.HTTP_200_OK
 
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_create_orders_bulk_success(self, auth_as_user):
+        logger.info("test_create_orders_bulk_success")
+        data = NewOrdersBulkSchema(orders=[
+            NewOrderWithProductsSchema(customer_name=f"customer {i}", products=[]) for i in range(3)
+        ])
+        response = await self.test_http_client.post(
+            url=f"{self.BASE_URL}/bulk",
+            json=data.model_dump(mode="json"),
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert [order["customer_name"] for order in response.json()] == ["customer 0", "customer 1", "customer 2"]
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_update_orders_status_success(self, auth_as_user):
+        logger.info("test_update_orders_status_success")
+        orders = [await self.create_new_order() for _ in range(2)]
+        missing = str(uuid.uuid4())
+        response = await self.test_http_client.patch(
+            url=f"{self.BASE_URL}/status",
+            json={"uuids": [order["uuid"] for order in orders] + [missing], "status": OrderStatus.CONFIRMED.value},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"updated": [order["uuid"] for order in orders], "not_updated": [missing]}
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_orders_list_and_page(self, auth_as_user):
+        logger.info("test_get_orders_list_and_page")
+        for _ in range(3):
+            await self.create_new_order()
+        params = {"status": OrderStatus.PENDING.value, "limit": 2}
+        response = await self.test_http_client.get(url=self.BASE_URL, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        assert isinstance(response.json(), list)
+        response = await self.test_http_client.get(url=f"{self.BASE_URL}/page", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page["items"]) == 2
+        response = await self.test_http_client.get(
+            url=f"{self.BASE_URL}/page", params={**params, "cursor": page["next_cursor"]}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        seen = [order["uuid"] for order in page["items"] + response.json()["items"]]
+        # pages of cursor pagination don't overlap
+        assert len(seen) == len(set(seen))
+
     @pytest.mark.asyncio(loop_scope="session")
     async def test_update_order_success(self, auth_as_user):
         logger.info("test_update_order_success")
@@ -16,6 +16,7 @@ from app.infrastructure.repositories.fake.orders import FakeOrderRepository
 from app.infrastructure.repositories.sqlalchemy import OrderRepository
 from app.interfaces.repositories import IOrderRepository
 from app.main import app
+from app.orders.cache import bind_refresh_sessions
 
 load_dotenv()
 settings.PG_DB = environ.get("POSTGRES_DB")
@@ -60,6 +61,7 @@ async def test_http_client() -> AsyncClient:
 
 # Dependency replacement effective for all tests
 app.dependency_overrides[async_session] = override_async_session
+bind_refresh_sessions(new_session)
 app.dependency_overrides[http_client] = test_http_client
 
 
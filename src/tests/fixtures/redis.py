@@ -0,0 +1,130 @@
+import time
+from datetime import timedelta
+
+
+class FakePipeline:
+    """
+    Queues commands of FakeRedis and runs them on execute
+    """
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.commands = []
+
+    def __getattr__(self, name: str):
+        command = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list:
+        results = [await command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+def seconds(value: int | timedelta) -> float:
+    return value.total_seconds() if isinstance(value, timedelta) else value
+
+
+class FakeRedis:
+    """
+    In-memory Redis with the commands used by order_cache, keys expire by monotonic clock,
+    scripts of order_cache are implemented by methods with the same effect
+    """
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.sets: dict[str, set[str]] = {}
+        self.expires: dict[str, float] = {}
+        self.published: list[tuple[str, str]] = []
+        self.calls: list[str] = []
+
+    def _alive(self, key: str) -> bool:
+        if key in self.expires and self.expires[key] <= time.monotonic():
+            self.data.pop(key, None)
+            self.sets.pop(key, None)
+            del self.expires[key]
+        return key in self.data or key in self.sets
+
+    def _expire_in(self, key: str, ttl: float | None) -> None:
+        if ttl is None:
+            self.expires.pop(key, None)
+        else:
+            self.expires[key] = time.monotonic() + ttl
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def get(self, key: str) -> bytes | None:
+        self.calls.append("get")
+        return self.data.get(key) if self._alive(key) else None
+
+    async def set(self, key: str, value, nx: bool = False, ex=None, px=None) -> bool | None:
+        self.calls.append("set")
+        if nx and self._alive(key):
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        self._expire_in(key, seconds(ex) if ex is not None else (seconds(px) / 1000 if px is not None else None))
+        return True
+
+    async def setex(self, key: str, ttl, value) -> bool:
+        return await self.set(key, value, ex=ttl)
+
+    async def pttl(self, key: str) -> int:
+        if not self._alive(key):
+            return -2
+        if key not in self.expires:
+            return -1
+        return int((self.expires[key] - time.monotonic()) * 1000)
+
+    async def exists(self, *keys: str) -> int:
+        return sum(self._alive(key) for key in keys)
+
+    async def expire(self, key: str, ttl) -> bool:
+        if not self._alive(key):
+            return False
+        self._expire_in(key, seconds(ttl))
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            deleted += self._alive(key)
+            self.data.pop(key, None)
+            self.sets.pop(key, None)
+            self.expires.pop(key, None)
+        return deleted
+
+    async def sadd(self, key: str, *members: str) -> int:
+        self._alive(key)
+        members = set(members) - self.sets.get(key, set())
+        self.sets.setdefault(key, set()).update(members)
+        return len(members)
+
+    async def smembers(self, key: str):
+        return set(self.sets.get(key, set())) if self._alive(key) else set()
+
+    async def publish(self, channel: str, message: str) -> int:
+        self.published.append((channel, message))
+        return 0
+
+    async def invalidate_tags(self, keys: list[str]) -> int:
+        for tag in keys:
+            await self.delete(*await self.smembers(tag))
+            await self.delete(tag)
+        return len(keys)
+
+    async def release_lock(self, keys: list[str], args: list[str]) -> int:
+        if await self.get(keys[0]) == args[0].encode():
+            return await self.delete(keys[0])
+        return 0
@@ -0,0 +1,28 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+import uuid
+
+from app.common.enums import UserRoleEnum
+
+SECRET = "secret-shared-with-auth-service-in-tests"
+
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def encode(claims: dict, secret: str = SECRET, alg: str = "HS256", header: object = None) -> str:
+    header = {"alg": alg, "typ": "JWT"} if header is None else header
+    message = f"{b64(json.dumps(header).encode())}.{b64(json.dumps(claims).encode())}"
+    signature = hmac.new(secret.encode(), message.encode(), hashlib.sha256).digest()
+    return f"{message}.{b64(signature)}"
+
+
+def make_claims(**kwargs) -> dict:
+    claims = {"sub": str(uuid.uuid4()), "username": "user", "role": UserRoleEnum.USER.value,
+              "exp": int(time.time()) + 60}
+    claims.update(kwargs)
+    return claims
@@ -0,0 +1,74 @@
+from decimal import Decimal
+from typing import Callable, Sequence
+from uuid import UUID
+
+import pytest
+import sqlalchemy as sa
+
+from app.common import logger
+from app.infrastructure.db.models import OrderModel, ProductModel
+from app.infrastructure.repositories.sqlalchemy import OrderRepository
+from app.orders.schemas import UserData
+from benchmarks.filter_orders import (
+    SEED_USER,
+    explain,
+    seed,
+)
+from tests.conftest import test_engine
+
+
+@pytest.mark.usefixtures("prepare_test_db")
+class TestQueryPlans:
+    """
+    Regression tests of indexes: hot queries of OrderRepository must not fall back to sequential scans
+    on seeded database, data is seeded in transaction which is rolled back after each test
+    """
+
+    @staticmethod
+    async def assert_index_scans(statements: Callable[[Sequence[UUID]], list[sa.Select]]) -> None:
+        """
+        :param statements: builds statements to check from uuids of some seeded orders
+        """
+        async with test_engine.connect() as connection:
+            transaction = await connection.begin()
+            try:
+                await seed(connection, orders=20_000, products_per_order=5)
+                order_uuids = (await connection.execute(sa.select(OrderModel.uuid).limit(20))).scalars().all()
+                for stmt in statements(order_uuids):
+                    plan = await explain(connection, stmt, analyze=False)
+                    logger.info(plan)
+                    assert "Seq Scan" not in plan, plan
+            finally:
+                await transaction.rollback()
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_filter_orders_as_user(self):
+        logger.info("test_filter_orders_as_user")
+        user = UserData(user_id=SEED_USER, is_admin=False)
+        await self.assert_index_scans(lambda order_uuids: [
+            OrderRepository.filter_orders_stmt(user),
+            OrderRepository.filter_orders_stmt(user, min_price=Decimal(100), max_price=Decimal(500)),
+            OrderRepository.filter_orders_stmt(user, min_total=Decimal(1000)),
+        ])
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_filter_orders_as_admin(self):
+        logger.info("test_filter_orders_as_admin")
+        admin = UserData(user_id=SEED_USER, is_admin=True)
+        await self.assert_index_scans(lambda order_uuids: [
+            OrderRepository.filter_orders_stmt(admin),
+            OrderRepository.filter_orders_stmt(admin, min_price=Decimal(100)),
+            OrderRepository.filter_orders_stmt(admin, min_total=Decimal(1000), max_total=Decimal(2000)),
+        ])
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_order(self):
+        logger.info("test_get_order")
+        user = UserData(user_id=SEED_USER, is_admin=False)
+        admin = UserData(user_id=SEED_USER, is_admin=True)
+        await self.assert_index_scans(lambda order_uuids: [
+            OrderRepository.get_order_stmt(order_uuids[0], user),
+            OrderRepository.get_order_stmt(order_uuids[0], admin),
+            # selectin load of products of loaded orders
+            sa.select(ProductModel).where(ProductModel.order_uuid.in_(order_uuids)),
+        ])
@@ -2,15 +2,29 @@ import uuid
 
 import pytest
 import pytest_asyncio
+import sqlalchemy as sa
 
 from app.common import logger
 from app.common.enums import OrderStatus
-from app.common.exceptions import ObjectDoesNotExistException
-from app.infrastructure.db.models import OrderModel
+from app.common.exceptions import (
+    NoPermissionException,
+    ObjectDoesNotExistException,
+)
+from app.infrastructure.db.models import (
+    OrderEventModel,
+    OrderModel,
+)
 from app.infrastructure.repositories.fake.orders import FakeOrderRepository
 from app.infrastructure.repositories.sqlalchemy import OrderRepository
+from app.infrastructure.repositories.sqlalchemy.outbox import OutboxRepository
 from app.interfaces.repositories.base import IBaseRepository
-from app.orders.schemas import UserData, NewOrderWithProductsSchema
+from app.orders.schemas import (
+    UserData,
+    NewOrderWithProductsSchema,
+    NewProductSchema,
+    OrderCursorSchema,
+    UpdateOrderWithProductsSchema,
+)
 from tests.conftest import (
     new_session,
     random_string,
@@ -25,10 +39,10 @@ class TestFakeOrderRepository:
     user: UserData
     admin: UserData
 
-    async def create_new_order(self, user):
+    async def create_new_order(self, user, products=None):
         data = NewOrderWithProductsSchema(
             customer_name=str(uuid.uuid4()),
-            products=[]
+            products=products or []
         )
         obj = await self.repo.create_order_with_products(user, data)
         return obj
@@ -61,6 +75,49 @@ class TestFakeOrderRepository:
         result = await self.repo.filter_orders(user=self.user)
         assert len(result) == 1
 
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_orders_with_cursor(self):
+        await self.clear_repo()
+        logger.info("test_get_orders_with_cursor")
+        created = [await self.create_new_order(self.user) for _ in range(5)]
+        first_page = await self.repo.filter_orders(user=self.user, limit=3)
+        last = first_page[-1]
+        cursor = OrderCursorSchema.decode(OrderCursorSchema(created_at=last.created_at, uuid=last.uuid).encode())
+        second_page = await self.repo.filter_orders(user=self.user, limit=3, cursor=cursor)
+        assert len(first_page) == 3
+        assert len(second_page) == 2
+        assert {obj.uuid for obj in first_page + second_page} == {obj.uuid for obj in created}
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_orders_with_single_sided_bounds(self):
+        await self.clear_repo()
+        logger.info("test_get_orders_with_single_sided_bounds")
+        cheap = await self.create_new_order(self.user, [NewProductSchema(name="a", price=10, quantity=1)])
+        expensive = await self.create_new_order(self.user, [
+            NewProductSchema(name="b", price=100, quantity=2),
+            NewProductSchema(name="c", price=5, quantity=1),
+        ])
+        assert [obj.uuid for obj in await self.repo.filter_orders(user=self.user, min_price=50)] == [expensive.uuid]
+        assert [obj.uuid for obj in await self.repo.filter_orders(user=self.user, max_price=5)] == [expensive.uuid]
+        assert [obj.uuid for obj in await self.repo.filter_orders(user=self.user, max_total=100)] == [cheap.uuid]
+        assert [obj.uuid for obj in await self.repo.filter_orders(user=self.user, min_total=10)] == [
+            cheap.uuid, expensive.uuid
+        ]
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_update_orders_status(self):
+        await self.clear_repo()
+        logger.info("test_update_orders_status")
+        own = await self.create_new_order(self.user)
+        other = await self.create_new_order(UserData(user_id=uuid.uuid4(), is_admin=False))
+        changes = await self.repo.update_orders_status(
+            [own.uuid, other.uuid, uuid.uuid4()], OrderStatus.CONFIRMED.value, self.user
+        )
+        assert [(change.uuid, change.old_status) for change in changes] == [(own.uuid, OrderStatus.PENDING)]
+        assert await self.repo.update_orders_status([own.uuid], OrderStatus.CONFIRMED.value, self.user) == []
+        changes = await self.repo.update_orders_status([other.uuid], OrderStatus.CANCELLED.value, self.admin)
+        assert [change.uuid for change in changes] == [other.uuid]
+
 
 class TestOrderRepository:
     """
@@ -93,6 +150,151 @@ class TestOrderRepository:
             await self.repo.get_by_id(object_id=non_existing_id)
         assert str(exception.value) == f"{OrderModel.__name__} object id {non_existing_id} not found"
 
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_filter_orders_returns_each_order_once(self):
+        logger.info("OrderRepository test_filter_orders_returns_each_order_once")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        repo = OrderRepository(session=new_session())
+        created = [
+            await repo.create_order_with_products(user, NewOrderWithProductsSchema(
+                customer_name=await random_string(15),
+                products=[NewProductSchema(name=await random_string(10), price=10, quantity=1) for _ in range(3)],
+            ))
+            for _ in range(2)
+        ]
+        result = await repo.filter_orders(user=user, limit=2, min_price=5)
+        assert sorted(obj.uuid for obj in result) == sorted(obj.uuid for obj in created)
+        result = await repo.filter_orders(user=user, max_total=30)
+        assert len(result) == 2
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_order_with_permission_check(self):
+        logger.info("OrderRepository test_get_order_with_permission_check")
+        owner = UserData(user_id=uuid.uuid4(), is_admin=False)
+        other = UserData(user_id=uuid.uuid4(), is_admin=False)
+        admin = UserData(user_id=uuid.uuid4(), is_admin=True)
+        repo = OrderRepository(session=new_session())
+        created = await repo.create_order_with_products(owner, NewOrderWithProductsSchema(
+            customer_name=await random_string(15),
+            products=[NewProductSchema(name=await random_string(10), price=10, quantity=1) for _ in range(2)],
+        ))
+        empty = await repo.create_order_with_products(owner, NewOrderWithProductsSchema(
+            customer_name=await random_string(15),
+            products=[],
+        ))
+        with pytest.raises(NoPermissionException):
+            await repo.get_order(object_id=created.uuid, user=other)
+        with pytest.raises(ObjectDoesNotExistException):
+            await repo.get_order(object_id=uuid.uuid4(), user=owner)
+        assert len((await repo.get_order(object_id=created.uuid, user=owner)).products) == 2
+        assert len((await repo.get_order(object_id=created.uuid, user=admin)).products) == 2
+        assert (await repo.get_order(object_id=empty.uuid, user=owner)).products == []
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_update_order_keeps_unchanged_products(self):
+        logger.info("OrderRepository test_update_order_keeps_unchanged_products")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        repo = OrderRepository(session=new_session())
+        products = [NewProductSchema(name=name, price=10, quantity=1) for name in ("a", "b")]
+        created = await repo.create_order_with_products(user, NewOrderWithProductsSchema(
+            customer_name=await random_string(15),
+            products=products,
+        ))
+        product_uuids = {product.name: product.uuid for product in created.products}
+        updated, old_status = await repo.update_order_with_products(created.uuid, UpdateOrderWithProductsSchema(
+            status=OrderStatus.CONFIRMED.value,
+            customer_name=created.customer_name,
+            products=[products[0], NewProductSchema(name="b", price=20, quantity=2), NewProductSchema(
+                name="c", price=1, quantity=1,
+            )],
+        ), user)
+        assert (old_status, updated.status) == (OrderStatus.PENDING, OrderStatus.CONFIRMED)
+        assert {product.name: product.uuid for product in updated.products if product.name != "c"} == product_uuids
+        assert updated.total_price == 51
+        db_obj = await OrderRepository(session=new_session()).get_order(object_id=created.uuid, user=user)
+        assert [product.name for product in updated.products] == ["a", "b", "c"]
+        assert sorted((p.name, p.price, p.quantity) for p in db_obj.products) == [
+            ("a", 10, 1), ("b", 20, 2), ("c", 1, 1),
+        ]
+        assert db_obj.total_price == 51
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_soft_delete_with_permission_check(self):
+        logger.info("OrderRepository test_soft_delete_with_permission_check")
+        owner = UserData(user_id=uuid.uuid4(), is_admin=False)
+        other = UserData(user_id=uuid.uuid4(), is_admin=False)
+        repo = OrderRepository(session=new_session())
+        created = await repo.create_order_with_products(owner, NewOrderWithProductsSchema(
+            customer_name=await random_string(15),
+            products=[],
+        ))
+        with pytest.raises(NoPermissionException):
+            await repo.soft_delete(object_id=created.uuid, user=other)
+        deleted = await repo.soft_delete(object_id=created.uuid, user=owner)
+        assert (deleted.uuid, deleted.user_id, deleted.status) == (created.uuid, owner.user_id, OrderStatus.PENDING)
+        with pytest.raises(ObjectDoesNotExistException):
+            await repo.soft_delete(object_id=created.uuid, user=owner)
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_create_orders_bulk(self):
+        logger.info("OrderRepository test_create_orders_bulk")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        repo = OrderRepository(session=new_session())
+        data = [
+            NewOrderWithProductsSchema(
+                customer_name=f"customer {i}",
+                products=[NewProductSchema(name=f"product {j}", price=10, quantity=1) for j in range(i)],
+            )
+            for i in range(3)
+        ]
+        created = await repo.create_orders_bulk(user, data)
+        assert [obj.customer_name for obj in created] == [order.customer_name for order in data]
+        assert [len(obj.products) for obj in created] == [0, 1, 2]
+        db_obj = await OrderRepository(session=new_session()).get_order(object_id=created[2].uuid, user=user)
+        assert len(db_obj.products) == 2
+        assert db_obj.total_price == 20
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_update_orders_status_saves_events(self):
+        logger.info("OrderRepository test_update_orders_status_saves_events")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        repo = OrderRepository(session=new_session())
+        created = await repo.create_orders_bulk(user, [
+            NewOrderWithProductsSchema(customer_name=await random_string(15), products=[]) for _ in range(3)
+        ])
+        order_uuids = [obj.uuid for obj in created]
+        changes = await repo.update_orders_status(order_uuids + [uuid.uuid4()], OrderStatus.CONFIRMED.value, user)
+        assert sorted(change.uuid for change in changes) == sorted(order_uuids)
+        async with new_session() as session:
+            events = (await session.execute(
+                sa.select(OrderEventModel).where(OrderEventModel.order_uuid.in_(order_uuids))
+            )).scalars().all()
+        assert len(events) == 3
+        assert {event.payload["new_status"] for event in events} == {OrderStatus.CONFIRMED.value}
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_outbox_fetch_and_mark_published(self):
+        logger.info("OrderRepository test_outbox_fetch_and_mark_published")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        repo = OrderRepository(session=new_session())
+        created = await repo.create_orders_bulk(user, [
+            NewOrderWithProductsSchema(customer_name=await random_string(15), products=[]) for _ in range(3)
+        ])
+        order_uuids = [obj.uuid for obj in created]
+        await repo.update_orders_status(order_uuids, OrderStatus.CONFIRMED.value, user)
+        async with new_session() as session:
+            outbox = OutboxRepository(session=session)
+            pending = [event for event in await outbox.fetch_pending(1000) if event.order_uuid in order_uuids]
+            # events written in one transaction have distinct creation times in order of writes
+            assert len(pending) == 3
+            assert len({event.created_at for event in pending}) == 3
+            assert [event.created_at for event in pending] == sorted(event.created_at for event in pending)
+            await outbox.mark_published([event.uuid for event in pending])
+            await session.commit()
+        async with new_session() as session:
+            pending = await OutboxRepository(session=session).fetch_pending(1000)
+        assert not {event.order_uuid for event in pending} & set(order_uuids)
+
     @pytest.mark.asyncio(loop_scope="session")
     async def test_get_by_id_success(self):
         logger.info("OrderRepository test_get_by_id_success")
@@ -0,0 +1,126 @@
+import time
+from datetime import timedelta
+
+import pytest
+from httpx import Response
+
+from app.common import logger
+from app.common.exceptions import InvalidTokenException
+from app.interfaces.repositories.users import IUserRepository
+from app.users import services
+from app.users.schemas import TokenSchema
+from app.users.services import AuthService
+from app.users.tokens import TokenVerifier
+from tests.fixtures.tokens import SECRET, encode, make_claims
+
+
+class FakeUserRepository(IUserRepository):
+    def __init__(self):
+        self.tokens = {}
+        self.revoked = {}
+        self.expirations = {}
+
+    async def set(self, key, obj):
+        self.tokens[key] = obj
+
+    async def set_with_expiration(self, key, obj, exp):
+        self.tokens[key] = obj
+        self.expirations[key] = exp
+
+    async def get(self, key):
+        return self.tokens.get(key)
+
+    async def revoke(self, key, exp):
+        self.tokens.pop(key, None)
+        self.revoked[key] = exp
+
+    async def is_revoked(self, key):
+        return key in self.revoked
+
+    async def create(self, obj, **kwargs):
+        await self.set_with_expiration(kwargs["key"], obj, kwargs["exp"])
+
+    async def get_by_id(self, object_id):
+        raise NotImplementedError
+
+    async def update(self, object_id, **values):
+        raise NotImplementedError
+
+    async def delete(self, object_id):
+        raise NotImplementedError
+
+
+class RemoteAuthService(AuthService):
+    """
+    Auth service recording requests to auth service instead of making them
+    """
+
+    def __init__(self, repo: IUserRepository):
+        super().__init__(http_client=None, repo=repo)
+        self.requests = []
+
+    async def validate_token(self, data):
+        self.requests.append(data.access_token)
+        return None
+
+
+@pytest.fixture
+def local_verifier(monkeypatch):
+    monkeypatch.setattr(services, "verifier", TokenVerifier(secret=SECRET, algorithms=["HS256"], leeway=0))
+
+
+@pytest.mark.usefixtures("local_verifier")
+class TestAuthService:
+    """
+    Unit tests of local verification and revocation of tokens by auth service
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_revoked_token_is_not_verified_again(self):
+        logger.info("test_revoked_token_is_not_verified_again")
+        repo = FakeUserRepository()
+        service = RemoteAuthService(repo)
+        token = encode(make_claims(exp=int(time.time()) + 120))
+        assert await service.get_token_payload(token) is not None
+        assert token in repo.tokens
+        await service.logout_user(token)
+        assert token not in repo.tokens
+        assert timedelta(seconds=100) < repo.revoked[token] <= timedelta(seconds=120 + services.settings.JWT_LEEWAY)
+        assert await service.get_token_payload(token) is None
+        assert token not in repo.tokens
+        assert service.requests == []
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_invalid_token_is_not_validated_remotely(self):
+        logger.info("test_invalid_token_is_not_validated_remotely")
+        service = RemoteAuthService(FakeUserRepository())
+        for token in (encode(make_claims(), secret="other"), encode(make_claims(exp=int(time.time()) - 1))):
+            with pytest.raises(InvalidTokenException):
+                await service.get_token_payload(token)
+        assert service.requests == []
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_unknown_token_is_validated_remotely(self):
+        logger.info("test_unknown_token_is_validated_remotely")
+        service = RemoteAuthService(FakeUserRepository())
+        token = encode(make_claims(), alg="RS256")
+        assert await service.get_token_payload(token) is None
+        assert service.requests == [token]
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_validate_token_ignores_expiration_of_other_types(self):
+        logger.info("test_validate_token_ignores_expiration_of_other_types")
+        repo = FakeUserRepository()
+        service = AuthService(http_client=None, repo=repo)
+        claims = make_claims(exp=int(time.time()) + 120)
+        for result in ({"exp": "never"}, {"expires_in": "3600"}, {"exp": None, "expires_in": [1]}):
+            async def request_data(url, payload):
+                return Response(200, json={
+                    "uuid": claims["sub"], "username": "user", "role": claims["role"], "is_active": True, **result,
+                })
+
+            service.request_data = request_data
+            token = encode(claims)
+            assert await service.validate_token(TokenSchema(access_token=token, token_type="bearer")) is not None
+            # exp claim of token is used
+            assert timedelta(seconds=100) < repo.expirations[token] <= timedelta(seconds=120)
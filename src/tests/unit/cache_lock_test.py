@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.common import logger
+from app.orders import cache
+
+
+class FakePipeline:
+    def __init__(self, store: "FakeStore"):
+        self.store = store
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def get(self, key):
+        self.commands.append(lambda: self.store.data.get(key))
+        return self
+
+    def exists(self, key):
+        self.commands.append(lambda: int(key in self.store.data))
+        return self
+
+    async def execute(self):
+        return [command() for command in self.commands]
+
+
+class FakeStore:
+    def __init__(self, data: dict):
+        self.data = data
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakeCodec:
+    def decode(self, data):
+        return data.decode()
+
+
+class TestCacheLock:
+    """
+    Unit tests of waiting for value loaded by holder of cache lock
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_wait_returns_loaded_value(self, monkeypatch):
+        logger.info("test_wait_returns_loaded_value")
+        store = FakeStore({"lock:key": b"token"})
+        monkeypatch.setattr(cache, "store", store)
+
+        async def holder():
+            await asyncio.sleep(0.05)
+            store.data["key"] = b"value"
+            del store.data["lock:key"]
+
+        task = asyncio.create_task(holder())
+        assert await cache.wait_for("key", FakeCodec()) == "value"
+        await task
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_wait_stops_when_lock_released_without_value(self, monkeypatch):
+        logger.info("test_wait_stops_when_lock_released_without_value")
+        store = FakeStore({"lock:key": b"token"})
+        monkeypatch.setattr(cache, "store", store)
+        loop = asyncio.get_running_loop()
+
+        async def failed_holder():
+            await asyncio.sleep(0.05)
+            del store.data["lock:key"]
+
+        task = asyncio.create_task(failed_holder())
+        started = loop.time()
+        assert await cache.wait_for("key", FakeCodec()) is None
+        # waiter doesn't wait for the whole lock TTL
+        assert loop.time() - started < cache.settings.ORDER_CACHE_LOCK_TTL / 1000 / 2
+        await task
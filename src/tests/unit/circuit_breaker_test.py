@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.common import logger
+from app.common.circuit_breaker import CircuitBreaker
+from app.common.enums import CircuitStateEnum
+from app.common.exceptions import CircuitOpenException
+from app.common.metrics import metrics
+
+
+async def fail():
+    raise ConnectionError()
+
+
+async def succeed():
+    return "ok"
+
+
+class TestCircuitBreaker:
+    """
+    Unit tests of circuit breaker
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_open_and_recover(self):
+        logger.info("test_open_and_recover")
+        breaker = CircuitBreaker(
+            "test_breaker", failure_exceptions=(ConnectionError,), min_calls=4, failure_rate=0.5, open_duration=0.05
+        )
+        await breaker.call(succeed)
+        await breaker.call(succeed)
+        with pytest.raises(ConnectionError):
+            await breaker.call(fail)
+        assert breaker.state == CircuitStateEnum.CLOSED
+        with pytest.raises(ConnectionError):
+            await breaker.call(fail)
+        assert breaker.state == CircuitStateEnum.OPEN
+        with pytest.raises(CircuitOpenException):
+            await breaker.call(succeed)
+
+        await asyncio.sleep(0.05)
+        assert breaker.state == CircuitStateEnum.HALF_OPEN
+        with pytest.raises(ConnectionError):
+            await breaker.call(fail)
+        assert breaker.state == CircuitStateEnum.OPEN
+
+        await asyncio.sleep(0.05)
+        assert await breaker.call(succeed) == "ok"
+        assert breaker.state == CircuitStateEnum.CLOSED
+
+        snapshot = metrics.snapshot()
+        assert snapshot["test_breaker_circuit_open_transitions"] == 2
+        assert snapshot["test_breaker_circuit_half_open_transitions"] == 2
+        assert snapshot["test_breaker_circuit_closed_transitions"] == 1
+        assert snapshot["test_breaker_circuit_rejected_calls"] == 1
+        assert snapshot["test_breaker_circuit_state"] == 0
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_open_on_slow_calls(self):
+        logger.info("test_open_on_slow_calls")
+        breaker = CircuitBreaker("test_slow_breaker", min_calls=2, slow_call_duration=0.01, slow_call_rate=0.5)
+
+        async def slow():
+            await asyncio.sleep(0.01)
+
+        await breaker.call(succeed)
+        await breaker.call(slow)
+        assert breaker.state == CircuitStateEnum.OPEN
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_ignore_calls_admitted_before_open(self):
+        logger.info("test_ignore_calls_admitted_before_open")
+        breaker = CircuitBreaker(
+            "test_stale_breaker", failure_exceptions=(ConnectionError,), min_calls=1, open_duration=0.02
+        )
+        release = asyncio.Event()
+
+        async def wait_and_fail():
+            await release.wait()
+            raise ConnectionError()
+
+        # call admitted while circuit is closed finishes after it became half-open
+        stale = asyncio.create_task(breaker.call(wait_and_fail))
+        await asyncio.sleep(0)
+        with pytest.raises(ConnectionError):
+            await breaker.call(fail)
+        assert breaker.state == CircuitStateEnum.OPEN
+        await asyncio.sleep(0.02)
+        assert breaker.state == CircuitStateEnum.HALF_OPEN
+        release.set()
+        with pytest.raises(ConnectionError):
+            await stale
+        assert breaker.state == CircuitStateEnum.HALF_OPEN
+        assert await breaker.call(succeed) == "ok"
+        assert breaker.state == CircuitStateEnum.CLOSED
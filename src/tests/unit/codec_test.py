@@ -0,0 +1,67 @@
+import pickle
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.common import logger
+from app.common.codecs import (
+    FLAG_COMPRESSED,
+    SchemaCodec,
+)
+from app.common.enums import OrderStatus
+from app.orders.schemas import OrderSchema
+from app.products.schemas import ProductSchema
+from tests.conftest import random_string
+
+
+class TestSchemaCodec:
+    """
+    Unit tests to check encoding of cached schemas
+    """
+
+    async def create_order(self, products: int = 1) -> OrderSchema:
+        return OrderSchema(
+            uuid=uuid.uuid4(),
+            status=OrderStatus.PENDING.value,
+            customer_name=await random_string(15),
+            user_id=uuid.uuid4(),
+            products=[
+                ProductSchema(
+                    uuid=uuid.uuid4(),
+                    name=await random_string(10),
+                    price=Decimal("10.50"),
+                    quantity=2,
+                )
+                for _ in range(products)
+            ]
+        )
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_round_trip(self):
+        logger.info("test_round_trip")
+        codec = SchemaCodec(list[OrderSchema], compress_threshold=1024)
+        orders = [await self.create_order(), await self.create_order()]
+        data = codec.encode(orders)
+        assert data[0] == SchemaCodec.VERSION
+        assert not data[1] & FLAG_COMPRESSED
+        assert codec.decode(data) == orders
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_compressed_above_threshold(self):
+        logger.info("test_compressed_above_threshold")
+        codec = SchemaCodec(OrderSchema, compress_threshold=64)
+        order = await self.create_order(products=20)
+        data = codec.encode(order)
+        assert data[1] & FLAG_COMPRESSED
+        assert len(data) < len(order.model_dump_json())
+        assert codec.decode(data) == order
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_other_version_is_ignored(self):
+        logger.info("test_other_version_is_ignored")
+        codec = SchemaCodec(OrderSchema)
+        order = await self.create_order()
+        data = codec.encode(order)
+        assert codec.decode(bytes((SchemaCodec.VERSION + 1,)) + data[1:]) is None
+        assert codec.decode(pickle.dumps(order)) is None
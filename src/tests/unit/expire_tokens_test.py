@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from app.common import logger, settings
+from app.users import expire_tokens as command
+from app.users.tokens import unverified_claims
+from tests.fixtures.tokens import encode, make_claims
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def ttl(self, key: bytes):
+        self.commands.append(("ttl", key))
+
+    def expireat(self, key: bytes, when: int):
+        self.commands.append(("expireat", key, when))
+
+    async def execute(self) -> list:
+        results = []
+        for name, key, *args in self.commands:
+            if name == "ttl":
+                results.append(self.redis.ttls[key])
+            else:
+                self.redis.writes.append((key, *args))
+                results.append(True)
+        return results
+
+
+class FakeRedis:
+    """
+    Keys matching TOKEN_PATTERN with their TTL, SCAN returns one key per call
+    """
+
+    def __init__(self, ttls: dict[bytes, int]):
+        self.ttls = ttls
+        self.writes = []
+
+    async def scan(self, cursor: int, match: str, count: int):
+        keys = list(self.ttls)
+        next_cursor = cursor + count
+        return (next_cursor if next_cursor < len(keys) else 0), keys[cursor:next_cursor]
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    exp = int(time.time()) + 120
+    redis = FakeRedis({
+        encode(make_claims(exp=exp)).encode(): -1,
+        encode(make_claims(exp=exp + 60)).encode(): 60,
+        encode(make_claims(exp=exp)).encode(): -2,
+        b"not.a.token": -1,
+        encode(make_claims(exp="never")).encode(): -1,
+    })
+    monkeypatch.setattr(command, "r", redis)
+    return redis
+
+
+class TestExpireTokens:
+    """
+    Unit tests of expire_tokens command with fake Redis
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_expire_tokens_without_ttl(self, redis):
+        logger.info("test_expire_tokens_without_ttl")
+        keys = list(redis.ttls)
+        stats = await command.expire_tokens(batch_size=2)
+        assert stats == {"scanned": 5, "expired": 2, "skipped": 1}
+        # key with TTL and key that is already gone are not touched
+        assert [key for key, _ in redis.writes] == [keys[0], keys[4]]
+        assert redis.writes[0][1] == unverified_claims(keys[0].decode())["exp"]
+        # token without numeric exp expires after TOKEN_DEFAULT_TTL
+        assert abs(redis.writes[1][1] - (time.time() + settings.TOKEN_DEFAULT_TTL)) <= 1
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_dry_run_makes_no_writes(self, redis):
+        logger.info("test_dry_run_makes_no_writes")
+        stats = await command.expire_tokens(batch_size=2, dry_run=True)
+        assert stats == {"scanned": 5, "expired": 2, "skipped": 1}
+        assert redis.writes == []
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.common import logger
+from app.common.metrics import metrics
+from app.infrastructure.adapters.http_client import SharedHttpClient
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: keep-alive\r\n\r\nok")
+            await writer.drain()
+    except asyncio.IncompleteReadError:
+        writer.close()
+
+
+async def handle_and_close(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    await reader.readuntil(b"\r\n\r\n")
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+    await writer.drain()
+    writer.close()
+
+
+class TestSharedHttpClient:
+    """
+    Unit tests of shared http client
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_connection_reused(self):
+        logger.info("test_connection_reused")
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        shared = SharedHttpClient("test_http", base_url=f"http://127.0.0.1:{port}", http2=False)
+        try:
+            client = await shared()
+            for _ in range(3):
+                response = await client.get("/")
+                assert response.status_code == 200
+            assert await shared() is client
+            snapshot = metrics.snapshot()
+            assert snapshot["test_http_requests"] == 3
+            assert snapshot["test_http_new_connections"] == 1
+            assert snapshot["test_http_connections"] == 1
+            assert snapshot["test_http_pool_wait_seconds"] >= 0
+        finally:
+            await shared.close()
+            server.close()
+        assert metrics.snapshot()["test_http_connections"] == 0
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_connections_closed_by_server(self):
+        logger.info("test_connections_closed_by_server")
+        server = await asyncio.start_server(handle_and_close, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        shared = SharedHttpClient("test_close_http", base_url=f"http://127.0.0.1:{port}", http2=False)
+        try:
+            client = await shared()
+            for _ in range(3):
+                response = await client.get("/")
+                assert response.status_code == 200
+            snapshot = metrics.snapshot()
+            assert snapshot["test_close_http_new_connections"] == 3
+            assert snapshot["test_close_http_connections"] == 0
+        finally:
+            await shared.close()
+            server.close()
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_trace_of_caller_is_kept(self):
+        logger.info("test_trace_of_caller_is_kept")
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        shared = SharedHttpClient("test_trace_http", base_url=f"http://127.0.0.1:{port}", http2=False)
+        events = []
+
+        async def trace(event_name: str, info: dict) -> None:
+            events.append(event_name)
+
+        try:
+            client = await shared()
+            response = await client.get("/", extensions={"trace": trace})
+            assert response.status_code == 200
+            assert "connection.connect_tcp.complete" in events
+            assert "http11.send_request_headers.started" in events
+            assert metrics.snapshot()["test_trace_http_new_connections"] == 1
+        finally:
+            await shared.close()
+            server.close()
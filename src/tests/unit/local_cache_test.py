@@ -0,0 +1,43 @@
+import pytest
+
+from app.common import logger
+from app.common.local_cache import LocalCache
+
+
+class TestLocalCache:
+    """
+    Unit tests to check eviction rules of in-process cache tier
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_evicts_least_recently_used(self):
+        logger.info("test_evicts_least_recently_used")
+        cache = LocalCache(max_entries=2, max_bytes=100)
+        cache.set("a", b"a", ttl=60, size=1)
+        cache.set("b", b"b", ttl=60, size=1)
+        assert cache.get("a") == b"a"
+        cache.set("c", b"c", ttl=60, size=1)
+        assert cache.get("b") is None
+        assert cache.get("a") == b"a"
+        assert cache.get("c") == b"c"
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_bounded_by_bytes(self):
+        logger.info("test_bounded_by_bytes")
+        cache = LocalCache(max_entries=10, max_bytes=10)
+        cache.set("a", b"a" * 6, ttl=60, size=6)
+        cache.set("b", b"b" * 6, ttl=60, size=6)
+        cache.set("c", b"c" * 11, ttl=60, size=11)
+        assert cache.get("a") is None
+        assert cache.get("b") is not None
+        assert cache.get("c") is None
+        assert cache.size == 6
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_expired_entry_is_removed(self):
+        logger.info("test_expired_entry_is_removed")
+        cache = LocalCache(max_entries=10, max_bytes=10)
+        cache.set("a", b"a", ttl=0, size=1)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        assert cache.size == 0
@@ -0,0 +1,297 @@
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+from app.common import logger
+from app.common.enums import OrderStatus
+from app.common.metrics import metrics
+from app.common.schemas import BaseSchema
+from app.orders import cache
+from app.orders.schemas import OrderFilterSchema, UserData
+from tests.fixtures.redis import FakeRedis
+
+
+class Item(BaseSchema):
+    user_id: UUID
+    name: str
+
+
+def counters(*names: str) -> dict[str, int]:
+    snapshot = metrics.snapshot()
+    return {name: snapshot.get(name, 0) for name in names}
+
+
+def increase(before: dict[str, int]) -> dict[str, int]:
+    after = counters(*before)
+    return {name: after[name] - before[name] for name in before}
+
+
+@pytest.fixture
+def store(monkeypatch) -> FakeRedis:
+    store = FakeRedis()
+    monkeypatch.setattr(cache, "store", store)
+    monkeypatch.setattr(cache, "invalidate_tags_script", store.invalidate_tags)
+    monkeypatch.setattr(cache, "release_lock_script", store.release_lock)
+    monkeypatch.setattr(cache.settings, "ORDER_CACHE_L1_ENABLED", True)
+    cache.local_store.clear()
+    yield store
+    cache.local_store.clear()
+
+
+@pytest.mark.usefixtures("store")
+class TestLocalTier:
+    """
+    Unit tests of in-process tier of order_cache in front of fake Redis
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_local_hit_skips_redis(self, store):
+        logger.info("test_local_hit_skips_redis")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        calls = []
+
+        @cache.order_cache(local=True, schema=Item)
+        async def get_order(user, order_uuid):
+            calls.append(order_uuid)
+            return Item(user_id=user.user_id, name="order")
+
+        order_uuid = uuid.uuid4()
+        before = counters("order_cache_l1_hits", "order_cache_l1_misses", "order_cache_l2_hits",
+                          "order_cache_l2_misses")
+        assert (await get_order(user=user, order_uuid=order_uuid)).name == "order"
+        assert str(order_uuid) in store.data
+        redis_calls = len(store.calls)
+        assert (await get_order(user=user, order_uuid=order_uuid)).name == "order"
+        assert len(store.calls) == redis_calls
+        assert calls == [order_uuid]
+        assert increase(before) == {
+            "order_cache_l1_hits": 1, "order_cache_l1_misses": 1, "order_cache_l2_hits": 0, "order_cache_l2_misses": 1,
+        }
+
+        # value evicted from the local tier is read from Redis, not loaded again
+        cache.local_store.delete(str(order_uuid))
+        before = counters("order_cache_l1_misses", "order_cache_l2_hits")
+        assert (await get_order(user=user, order_uuid=order_uuid)).name == "order"
+        assert calls == [order_uuid]
+        assert increase(before) == {"order_cache_l1_misses": 1, "order_cache_l2_hits": 1}
+        assert cache.local_store.get(str(order_uuid)) is not None
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_update_notifies_other_workers(self, store):
+        logger.info("test_update_notifies_other_workers")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        order_uuid = uuid.uuid4()
+
+        @cache.order_cache(update=True, local=True, schema=Item)
+        async def update_order(user, order_uuid):
+            return Item(user_id=user.user_id, name="updated")
+
+        cache.local_store.set(str(order_uuid), Item(user_id=user.user_id, name="order"), ttl=10)
+        await update_order(user=user, order_uuid=order_uuid)
+        assert cache.local_store.get(str(order_uuid)) is None
+        assert store.published == [(cache.INVALIDATION_CHANNEL, f"{cache.worker_id}:{order_uuid}")]
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_invalidation_of_other_worker_evicts_local_entry(self):
+        logger.info("test_invalidation_of_other_worker_evicts_local_entry")
+        cache.local_store.set("key:with:colons", "value", ttl=10)
+        # own message, the entry was already deleted by the sender
+        await cache.handle_invalidation({"data": f"{cache.worker_id}:key:with:colons".encode()})
+        assert cache.local_store.get("key:with:colons") == "value"
+        await cache.handle_invalidation({"data": f"{uuid.uuid4().hex}:key:with:colons".encode()})
+        assert cache.local_store.get("key:with:colons") is None
+
+
+def cached_listing(calls: list):
+    @cache.order_cache(expiration=60, schema=list[Item])
+    async def get_orders(user, filter_query):
+        calls.append((user.user_id, filter_query.status))
+        return [Item(user_id=user.user_id, name=filter_query.status.value)]
+
+    return get_orders
+
+
+class TestListingTags:
+    """
+    Unit tests of scoping of cached order listings and their invalidation by tags
+    """
+
+    def test_listing_key_scoped_by_user_and_filters(self):
+        logger.info("test_listing_key_scoped_by_user_and_filters")
+        user, other = UserData(user_id=uuid.uuid4(), is_admin=False), UserData(user_id=uuid.uuid4(), is_admin=False)
+        pending = OrderFilterSchema(status=OrderStatus.PENDING)
+        key = cache.listing_key(user, pending)
+        assert key == cache.listing_key(user, OrderFilterSchema(status=OrderStatus.PENDING))
+        assert key != cache.listing_key(other, pending)
+        assert key != cache.listing_key(user, OrderFilterSchema(status=OrderStatus.CONFIRMED))
+        assert key != cache.listing_key(user, OrderFilterSchema(status=OrderStatus.PENDING, min_total=Decimal("10")))
+
+    def test_affected_tags_of_owner_and_admins(self):
+        logger.info("test_affected_tags_of_owner_and_admins")
+        user_id = uuid.uuid4()
+        tags = cache.affected_listing_tags(user_id, [OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.PENDING])
+        assert sorted(tags) == sorted([
+            f"orders:tag:user:{user_id}:PENDING",
+            f"orders:tag:user:{user_id}:CONFIRMED",
+            "orders:tag:status:PENDING",
+            "orders:tag:status:CONFIRMED",
+        ])
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_invalidate_listings_deletes_tagged_keys(self, store):
+        logger.info("test_invalidate_listings_deletes_tagged_keys")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        admin = UserData(user_id=uuid.uuid4(), is_admin=True)
+        pending = OrderFilterSchema(status=OrderStatus.PENDING)
+        confirmed = OrderFilterSchema(status=OrderStatus.CONFIRMED)
+        calls = []
+        get_orders = cached_listing(calls)
+        for caller, filter_query in ((user, pending), (user, confirmed), (admin, pending)):
+            await get_orders(user=caller, filter_query=filter_query)
+        assert await store.smembers(f"orders:tag:user:{user.user_id}:PENDING") == {cache.listing_key(user, pending)}
+        assert await store.smembers("orders:tag:status:PENDING") == {cache.listing_key(admin, pending)}
+
+        await cache.invalidate_listings(user.user_id, [OrderStatus.PENDING])
+        assert cache.listing_key(user, pending) not in store.data
+        assert cache.listing_key(admin, pending) not in store.data
+        assert cache.listing_key(user, confirmed) in store.data
+        assert f"orders:tag:user:{user.user_id}:PENDING" not in store.sets
+        assert "orders:tag:status:PENDING" not in store.sets
+        assert f"orders:tag:user:{user.user_id}:CONFIRMED" in store.sets
+
+        # invalidated listings are loaded again, the one left is served from cache
+        calls.clear()
+        for caller, filter_query in ((user, pending), (user, confirmed), (admin, pending)):
+            await get_orders(user=caller, filter_query=filter_query)
+        assert calls == [(user.user_id, OrderStatus.PENDING), (admin.user_id, OrderStatus.PENDING)]
+
+
+class FakeSessions:
+    """
+    Sessionmaker of refreshes, records opened and closed sessions
+    """
+
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        self.opened += 1
+        return f"session{self.opened}"
+
+    async def __aexit__(self, *args):
+        self.closed += 1
+
+
+class FakeOrderService:
+    def __init__(self, version: dict, session: str = "request"):
+        self.version = version
+        self.session = session
+
+    def with_session(self, session: str) -> "FakeOrderService":
+        return FakeOrderService(self.version, session)
+
+    async def filter_orders(self, user: UserData, filters: OrderFilterSchema) -> list[Item]:
+        if self.version.get("fail"):
+            raise ConnectionError("database is not available")
+        return [Item(user_id=user.user_id, name=f"v{self.version['n']}:{self.session}")]
+
+
+@cache.order_cache(expiration=60, soft_ttl=10, schema=list[Item])
+async def get_orders(user, filter_query, service):
+    return await service.filter_orders(user, filters=filter_query)
+
+
+def make_stale(store: FakeRedis, key: str) -> None:
+    # value older than soft_ttl has less than expiration - soft_ttl seconds to live
+    store.expires[key] = time.monotonic() + 40
+
+
+@pytest.fixture
+def sessions(monkeypatch) -> FakeSessions:
+    sessions = FakeSessions()
+    monkeypatch.setattr(cache, "refresh_sessions", sessions)
+    return sessions
+
+
+class TestStaleWhileRevalidate:
+    """
+    Unit tests of background refresh of stale values of order_cache
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_stale_value_served_and_refreshed(self, store, sessions):
+        logger.info("test_stale_value_served_and_refreshed")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        filter_query = OrderFilterSchema(status=OrderStatus.PENDING)
+        key = cache.listing_key(user, filter_query)
+        version = {"n": 1}
+        service = FakeOrderService(version)
+        assert (await get_orders(user=user, filter_query=filter_query, service=service))[0].name == "v1:request"
+
+        # fresh value is served without refresh
+        version["n"] = 2
+        before = counters("order_cache_stale_hits", "order_cache_refreshes", "order_cache_refresh_failures")
+        assert (await get_orders(user=user, filter_query=filter_query, service=service))[0].name == "v1:request"
+        assert not cache.refreshes
+
+        make_stale(store, key)
+        assert (await get_orders(user=user, filter_query=filter_query, service=service))[0].name == "v1:request"
+        assert len(cache.refreshes) == 1
+        await asyncio.gather(*cache.refreshes)
+        assert (sessions.opened, sessions.closed) == (1, 1)
+        assert await store.pttl(key) > 50_000
+        assert await store.pttl(f"refresh:{key}") > 0
+        assert (await get_orders(user=user, filter_query=filter_query, service=service))[0].name == "v2:session1"
+        assert increase(before) == {
+            "order_cache_stale_hits": 1, "order_cache_refreshes": 1, "order_cache_refresh_failures": 0,
+        }
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_refreshes_rate_limited(self, store, sessions, monkeypatch):
+        logger.info("test_refreshes_rate_limited")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        filter_query = OrderFilterSchema(status=OrderStatus.PENDING)
+        key = cache.listing_key(user, filter_query)
+        service = FakeOrderService({"n": 1})
+        await get_orders(user=user, filter_query=filter_query, service=service)
+        make_stale(store, key)
+        before = counters("order_cache_stale_hits", "order_cache_refreshes")
+
+        # key was refreshed recently by another worker
+        await store.set(f"refresh:{key}", "worker", nx=True, ex=10)
+        await get_orders(user=user, filter_query=filter_query, service=service)
+        assert not cache.refreshes
+
+        # worker runs as many refreshes as it may
+        await store.delete(f"refresh:{key}")
+        monkeypatch.setattr(cache.settings, "ORDER_CACHE_MAX_REFRESHES", 0)
+        await get_orders(user=user, filter_query=filter_query, service=service)
+        assert not cache.refreshes
+        assert sessions.opened == 0
+        assert increase(before) == {"order_cache_stale_hits": 2, "order_cache_refreshes": 0}
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_failed_refresh_keeps_stale_value(self, store, sessions):
+        logger.info("test_failed_refresh_keeps_stale_value")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        filter_query = OrderFilterSchema(status=OrderStatus.PENDING)
+        key = cache.listing_key(user, filter_query)
+        version = {"n": 1}
+        service = FakeOrderService(version)
+        await get_orders(user=user, filter_query=filter_query, service=service)
+        make_stale(store, key)
+        version["fail"] = True
+        before = counters("order_cache_refreshes", "order_cache_refresh_failures")
+        assert (await get_orders(user=user, filter_query=filter_query, service=service))[0].name == "v1:request"
+        await asyncio.gather(*cache.refreshes)
+        assert (sessions.opened, sessions.closed) == (1, 1)
+        assert (await get_orders(user=user, filter_query=filter_query, service=service))[0].name == "v1:request"
+        assert increase(before) == {"order_cache_refreshes": 1, "order_cache_refresh_failures": 1}
@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+
+from app.common import logger
+from app.common.enums import OrderStatus
+from app.infrastructure.repositories.fake.orders import FakeOrderRepository
+from app.infrastructure.repositories.sqlalchemy import OrderRepository
+from app.interfaces.cache import IOrderCache
+from app.orders.schemas import (
+    NewOrderWithProductsSchema,
+    UpdateOrderWithProductsSchema,
+    UserData,
+)
+from app.orders.services import OrderService
+
+
+class RecordingOrderCache(IOrderCache):
+    def __init__(self):
+        self.listings = []
+        self.changes = []
+
+    async def invalidate_listings(self, user_id, statuses):
+        self.listings.append((user_id, set(statuses)))
+
+    async def invalidate_status_changes(self, changes):
+        self.changes.extend(changes)
+
+
+class TestOrderServiceCache:
+    """
+    Unit tests of cache invalidation by order service
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_update_invalidates_old_and_new_status_listings(self):
+        logger.info("test_update_invalidates_old_and_new_status_listings")
+        user = UserData(user_id=uuid.uuid4(), is_admin=False)
+        cache = RecordingOrderCache()
+        service = OrderService(repo=FakeOrderRepository(), cache=cache)
+        created = await service.create_order(user, NewOrderWithProductsSchema(customer_name="customer", products=[]))
+        await service.update_order(user, created.uuid, UpdateOrderWithProductsSchema(
+            status=OrderStatus.CONFIRMED, customer_name="customer", products=[],
+        ))
+        assert cache.listings == [
+            (user.user_id, {OrderStatus.PENDING}),
+            (user.user_id, {OrderStatus.PENDING, OrderStatus.CONFIRMED}),
+        ]
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_with_session_keeps_request_service(self):
+        logger.info("test_with_session_keeps_request_service")
+        request_session, background_session = object(), object()
+        service = OrderService(repo=OrderRepository(session=request_session), cache=RecordingOrderCache())
+        background = service.with_session(background_session)
+        assert isinstance(background.repo, OrderRepository)
+        assert background.repo.session is background_session
+        assert background.cache is service.cache
+        assert service.repo.session is request_session
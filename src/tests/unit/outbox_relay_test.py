@@ -0,0 +1,115 @@
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.common import logger
+from app.events.relay import OutboxRelay
+
+
+class FakeOutbox:
+    """
+    Outbox table shared by fake sessions, marks are applied on commit only
+    """
+
+    def __init__(self, count: int):
+        self.events = [SimpleNamespace(uuid=uuid.uuid4(), payload={"n": i}, published=False) for i in range(count)]
+        self.commits = 0
+
+
+class FakeSession:
+    def __init__(self, outbox: FakeOutbox):
+        self.outbox = outbox
+        self.marked: list[uuid.UUID] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        # not committed marks are rolled back
+        self.marked = []
+
+    async def commit(self):
+        for event in self.outbox.events:
+            if event.uuid in self.marked:
+                event.published = True
+        self.outbox.commits += 1
+
+
+class FakeOutboxRepository:
+    def __init__(self, session: FakeSession):
+        self.session = session
+
+    async def fetch_pending(self, limit: int):
+        return [event for event in self.session.outbox.events if not event.published][:limit]
+
+    async def mark_published(self, object_ids: list[uuid.UUID]):
+        self.session.marked.extend(object_ids)
+
+
+class FakePublisher:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.messages: list[str] = []
+
+    async def publish_batch(self, messages: list[str]):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("broker is not available")
+        self.messages.extend(messages)
+
+
+def make_relay(outbox: FakeOutbox, publisher: FakePublisher, batch_size: int = 2) -> OutboxRelay:
+    return OutboxRelay(
+        session=lambda: FakeSession(outbox),
+        publisher=publisher,
+        batch_size=batch_size,
+        poll_interval=0.01,
+        repository=FakeOutboxRepository,
+    )
+
+
+class TestOutboxRelay:
+    """
+    Unit tests of outbox relay with fake publisher and outbox
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_relay_batch_publishes_and_marks_events(self):
+        logger.info("test_relay_batch_publishes_and_marks_events")
+        outbox, publisher = FakeOutbox(3), FakePublisher()
+        relay = make_relay(outbox, publisher)
+        assert await relay.relay_batch() == 2
+        assert [json.loads(message) for message in publisher.messages] == [{"n": 0}, {"n": 1}]
+        assert [event.published for event in outbox.events] == [True, True, False]
+        assert await relay.relay_batch() == 1
+        assert await relay.relay_batch() == 0
+        assert all(event.published for event in outbox.events)
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_failed_batch_stays_pending(self):
+        logger.info("test_failed_batch_stays_pending")
+        outbox, publisher = FakeOutbox(2), FakePublisher(failures=1)
+        relay = make_relay(outbox, publisher)
+        with pytest.raises(ConnectionError):
+            await relay.relay_batch()
+        assert not any(event.published for event in outbox.events)
+        assert outbox.commits == 0
+        assert await relay.relay_batch() == 2
+        assert all(event.published for event in outbox.events)
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_run_retries_after_failure(self):
+        logger.info("test_run_retries_after_failure")
+        outbox, publisher = FakeOutbox(3), FakePublisher(failures=2)
+        relay = make_relay(outbox, publisher)
+        relay.start()
+        for _ in range(100):
+            if all(event.published for event in outbox.events):
+                break
+            await asyncio.sleep(0.01)
+        await relay.stop()
+        assert all(event.published for event in outbox.events)
+        assert len(publisher.messages) == 3
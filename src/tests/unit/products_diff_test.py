@@ -0,0 +1,53 @@
+import uuid
+from decimal import Decimal
+
+from app.common import logger
+from app.infrastructure.db.models import ProductModel
+from app.infrastructure.repositories.sqlalchemy.orders import diff_products
+from app.products.schemas import NewProductSchema
+
+
+class TestDiffProducts:
+    """
+    Unit tests of matching new products of the order to stored ones on update
+    """
+
+    @staticmethod
+    def stored(name: str, price: str, quantity: int) -> ProductModel:
+        return ProductModel(uuid=uuid.uuid4(), name=name, price=Decimal(price), quantity=quantity)
+
+    def test_unchanged_products(self):
+        logger.info("test_unchanged_products")
+        stored = [self.stored("a", "10.00", 1), self.stored("b", "5.50", 2)]
+        diff = diff_products(stored, [
+            NewProductSchema(name="b", price=Decimal("5.5"), quantity=2),
+            NewProductSchema(name="a", price=Decimal(10), quantity=1),
+        ])
+        assert sorted(product.name for product in diff.kept) == ["a", "b"]
+        assert not diff.updated and not diff.inserted and not diff.deleted
+
+    def test_changed_products(self):
+        logger.info("test_changed_products")
+        kept, changed, removed = self.stored("a", "10.00", 1), self.stored("b", "5.00", 2), self.stored("c", "1.00", 1)
+        diff = diff_products([kept, changed, removed], [
+            NewProductSchema(name="a", price=Decimal(10), quantity=1),
+            NewProductSchema(name="b", price=Decimal(5), quantity=3),
+            NewProductSchema(name="d", price=Decimal(2), quantity=1),
+        ])
+        assert diff.kept == [kept]
+        assert [(stored, product.quantity) for stored, product in diff.updated] == [(changed, 3)]
+        assert [product.name for product in diff.inserted] == ["d"]
+        assert diff.deleted == [removed]
+
+    def test_products_in_request_order(self):
+        logger.info("test_products_in_request_order")
+        kept, changed = self.stored("a", "10.00", 1), self.stored("b", "5.00", 2)
+        diff = diff_products([kept, changed], [
+            NewProductSchema(name="d", price=Decimal(2), quantity=1),
+            NewProductSchema(name="b", price=Decimal(5), quantity=3),
+            NewProductSchema(name="e", price=Decimal(3), quantity=1),
+            NewProductSchema(name="a", price=Decimal(10), quantity=1),
+        ])
+        inserted = [self.stored(product.name, product.price, product.quantity) for product in diff.inserted]
+        assert [product.name for product in diff.products(inserted)] == ["d", "b", "e", "a"]
+        assert diff.products(inserted)[1] is changed
@@ -12,7 +12,7 @@ from tests.conftest import random_string
 
 class TestOrderSchema:
     """
-    Unit test to validate OrderSchema property "total_price"
+    Unit test to validate OrderSchema totals "total_price" and "item_count"
     """
 
     schema: OrderSchema
@@ -36,3 +36,18 @@ class TestOrderSchema:
             ]
         )
         assert order.total_price == product_price * product_quantity
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_order_stored_total(self):
+        logger.info("test_order_stored_total")
+        order = OrderSchema(
+            uuid=uuid.uuid4(),
+            status=OrderStatus.PENDING.value,
+            customer_name=await random_string(15),
+            user_id=uuid.uuid4(),
+            products=[],
+            total_price=Decimal("12.50"),
+            item_count=3,
+        )
+        assert order.total_price == Decimal("12.50")
+        assert order.item_count == 3
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from app.common import logger
+from app.common.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """
+    Unit tests to check coalescing of concurrent calls with the same key
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_concurrent_calls_share_result(self):
+        logger.info("test_concurrent_calls_share_result")
+        flights = SingleFlight()
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flights.do("key", load) for _ in range(10)))
+        assert results == [1] * 10
+        assert calls == 1
+        assert "key" not in flights
+        assert await flights.do("key", load) == 2
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_exception_is_shared(self):
+        logger.info("test_exception_is_shared")
+        flights = SingleFlight()
+
+        async def load():
+            await asyncio.sleep(0.01)
+            raise ValueError("load failed")
+
+        results = await asyncio.gather(*(flights.do("key", load) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert "key" not in flights
@@ -0,0 +1,29 @@
+import uuid
+
+import pytest
+
+from app.common import logger
+from app.common.enums import UserRoleEnum
+from app.infrastructure.repositories.redis.users import (
+    handle_revocation,
+    token_cache,
+    token_key,
+)
+from app.users.schemas import TokenPayload
+
+
+class TestTokenCache:
+    """
+    Unit tests of in-process cache of token payloads
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_revocation_drops_cached_token(self):
+        logger.info("test_revocation_drops_cached_token")
+        token = "header.payload.signature"
+        payload = TokenPayload(uuid=str(uuid.uuid4()), username="user", role=UserRoleEnum.USER.value, is_active=True)
+        token_cache.set(token_key(token), payload, ttl=10)
+        assert token_key(token) != token
+        assert token_cache.get(token_key(token)) == payload
+        await handle_revocation({"data": token_key(token).encode()})
+        assert token_cache.get(token_key(token)) is None
@@ -0,0 +1,133 @@
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from httpx import AsyncClient, ConnectError, MockTransport, Request, Response
+from jwt.algorithms import RSAAlgorithm
+
+from app.common import logger, settings
+from app.common.circuit_breaker import CircuitBreaker
+from app.common.enums import CircuitStateEnum
+from app.common.exceptions import InvalidTokenException
+from app.users.tokens import TokenVerifier, payload_from_claims, token_expiration
+from tests.fixtures.tokens import SECRET, encode, make_claims
+
+
+class TestTokenVerifier:
+    """
+    Unit tests of local verification of tokens
+    """
+    verifier = TokenVerifier(secret=SECRET, algorithms=["HS256"], leeway=0)
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_verify_hs256(self):
+        logger.info("test_verify_hs256")
+        claims = make_claims()
+        assert await self.verifier.verify(encode(claims), http_client=None) == claims
+        payload = payload_from_claims(claims)
+        assert payload.uuid == claims["sub"]
+        assert payload.is_active
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_reject_invalid_tokens(self):
+        logger.info("test_reject_invalid_tokens")
+        for token in (
+                encode(make_claims(), secret="other"),
+                encode(make_claims(exp=int(time.time()) - 1)),
+                encode(make_claims(nbf=int(time.time()) + 60)),
+        ):
+            with pytest.raises(InvalidTokenException):
+                await self.verifier.verify(token, http_client=None)
+        # tokens that can't be verified locally
+        assert await self.verifier.verify(encode(make_claims(), alg="none"), http_client=None) is None
+        assert await self.verifier.verify(encode(make_claims(), header=[1]), http_client=None) is None
+        assert await self.verifier.verify(encode(make_claims(), header="HS256"), http_client=None) is None
+        assert await self.verifier.verify(encode([1]), http_client=None) is None
+        assert await self.verifier.verify("not a token", http_client=None) is None
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_claims_without_user_data(self):
+        logger.info("test_claims_without_user_data")
+        claims = make_claims()
+        del claims["role"]
+        assert payload_from_claims(claims) is None
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_token_expiration(self):
+        logger.info("test_token_expiration")
+        exp = int(time.time()) + 120
+        assert 100 < token_expiration(encode(make_claims(exp=exp))).total_seconds() <= 120
+        assert 200 < token_expiration(encode(make_claims(exp=exp)), exp=exp + 100).total_seconds() <= 220
+        assert token_expiration(encode(make_claims(exp=int(time.time()) - 10))).total_seconds() < 0
+        assert token_expiration("opaque-token").total_seconds() == settings.TOKEN_DEFAULT_TTL
+
+
+class TestJWKS:
+    """
+    Unit tests of verification of RS256 tokens with keys of JWKS of auth service
+    """
+
+    @staticmethod
+    def jwks_client(*documents) -> tuple[AsyncClient, list]:
+        requests = []
+
+        def handler(request: Request) -> Response:
+            requests.append(request)
+            return Response(200, json=documents[min(len(requests), len(documents)) - 1])
+
+        return AsyncClient(transport=MockTransport(handler)), requests
+
+    @staticmethod
+    def rsa_verifier(**kwargs) -> TokenVerifier:
+        return TokenVerifier(secret="", algorithms=["RS256"], jwks_url="http://auth/jwks", leeway=0, **kwargs)
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_verify_rs256(self):
+        logger.info("test_verify_rs256")
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = {**json.loads(RSAAlgorithm.to_jwk(key.public_key())), "kid": "key1"}
+        client, requests = self.jwks_client({"keys": [jwk]})
+        verifier = self.rsa_verifier()
+        claims = make_claims()
+        other = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+        def sign(private_key, kid: str) -> str:
+            return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid})
+
+        assert await verifier.verify(sign(key, "key1"), client) == claims
+        with pytest.raises(InvalidTokenException):
+            await verifier.verify(sign(other, "key1"), client)
+        # unknown key can't be verified locally, JWKS is not fetched again within a minute
+        assert await verifier.verify(sign(other, "key2"), client) is None
+        assert len(requests) == 1
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_invalid_jwks(self):
+        logger.info("test_invalid_jwks")
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        token = jwt.encode(make_claims(), key, algorithm="RS256", headers={"kid": "key1"})
+        for document in ([], {"keys": {}}, {"keys": [[], {"kty": "RSA", "kid": "key1", "n": 1, "e": "AQAB"}]}):
+            client, requests = self.jwks_client(document)
+            assert await self.rsa_verifier().verify(token, client) is None
+            assert len(requests) == 1
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_jwks_through_breaker(self):
+        logger.info("test_jwks_through_breaker")
+        breaker = CircuitBreaker("test_jwks_breaker", min_calls=1, failure_rate=0.5)
+        requests = []
+
+        def fail(request: Request) -> Response:
+            requests.append(request)
+            raise ConnectError("auth service is down", request=request)
+
+        client = AsyncClient(transport=MockTransport(fail))
+        token = jwt.encode(make_claims(), rsa.generate_private_key(public_exponent=65537, key_size=2048),
+                           algorithm="RS256", headers={"kid": "key1"})
+        assert await self.rsa_verifier(breaker=breaker).verify(token, client) is None
+        assert breaker.state == CircuitStateEnum.OPEN
+        # open circuit rejects fetch of JWKS without calling auth service
+        assert await self.rsa_verifier(breaker=breaker).verify(token, client) is None
+        assert len(requests) == 1
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.common import logger
+from app.infrastructure.db.transactions import transactional
+
+
+class SerializationFailure(Exception):
+    sqlstate = "40001"
+
+
+class Session:
+    def __init__(self):
+        self.rollbacks = 0
+        self.isolation_levels = []
+
+    def in_transaction(self) -> bool:
+        return False
+
+    async def connection(self, execution_options: dict):
+        self.isolation_levels.append(execution_options["isolation_level"])
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+class Repository:
+    def __init__(self, failures: int):
+        self.session = Session()
+        self.failures = failures
+        self.calls = 0
+
+    @transactional(isolation_level="REPEATABLE READ", retries=2)
+    async def update(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise DBAPIError("UPDATE", {}, SerializationFailure())
+        return self.calls
+
+
+class TestTransactional:
+    """
+    Unit tests to check isolation level and retries of transactional repository methods
+    """
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_retry_on_serialization_failure(self):
+        logger.info("test_retry_on_serialization_failure")
+        repo = Repository(failures=2)
+        assert await repo.update() == 3
+        assert repo.session.rollbacks == 2
+        assert repo.session.isolation_levels == ["REPEATABLE READ"] * 3
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_retries_are_bounded(self):
+        logger.info("test_retries_are_bounded")
+        repo = Repository(failures=5)
+        with pytest.raises(DBAPIError):
+            await repo.update()
+        assert repo.calls == 3